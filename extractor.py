@@ -1,122 +1,331 @@
 # extractor_optimized.py — leitura Excel otimizada com cache
 
+from collections import OrderedDict
 from pathlib import Path
+import fnmatch
+import os
+import numpy as np
 import pandas as pd
+import openpyxl
 import re
-from typing import Optional, Tuple
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence, Tuple
 from functools import lru_cache
 
+from persistent_cache import PersistentCache
+
+try:
+    # Parser nativo (Rust) — bem mais rápido que openpyxl
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
 # Regex pré-compilado
 HEADER_CLEANUP = re.compile(r"\s+")
+HEADER_TRANSLATE = str.maketrans({"\u00A0": " ", "\r": " ", "\n": " "})
+
+# str() + strip() célula a célula, aplicado sobre o array inteiro
+CELL_CLEANUP = np.frompyfunc(lambda v: str(v).strip(), 1, 1)
+
+# Máximo de abas mantidas em memória (L1)
+SHEET_CACHE_MAXSIZE = 8
+
+
+def _list_sheets_fast(path: Path) -> Optional[Tuple[str, ...]]:
+    """Lista as abas lendo só xl/workbook.xml de dentro do ZIP.
+    
+    Não instancia parser de planilha; retorna None se o arquivo não for um
+    XLSX válido (o chamador cai para o parse completo).
+    """
+    try:
+        with zipfile.ZipFile(path) as zf, zf.open("xl/workbook.xml") as fh:
+            names = []
+            for event, elem in ET.iterparse(fh, events=("end",)):
+                tag = elem.tag.rpartition("}")[2]
+                if tag == "sheet":
+                    names.append(elem.get("name", ""))
+                elif tag == "sheets":
+                    break  # o resto do workbook.xml não interessa
+            return tuple(names)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError):
+        return None
 
 
 class Extractor:
-    def __init__(self, xlsx_dir: Path):
+    def __init__(
+        self,
+        xlsx_dir: Path,
+        cache: Optional[PersistentCache] = None,
+        max_cached_sheets: int = SHEET_CACHE_MAXSIZE
+    ):
+        """
+        Args:
+            xlsx_dir: Diretório com as planilhas
+            cache: Cache persistente em disco usado como L2 (opcional)
+            max_cached_sheets: Limite do LRU de abas em memória (L1)
+        """
         self.xlsx_dir = Path(xlsx_dir)
-        self._sheet_cache = {}  # Cache de abas por arquivo
+        self.cache = cache
+        self._max_cached_sheets = max_cached_sheets
+        # L1: LRU de abas lidas (chave -> (df, nome da aba))
+        self._sheet_cache: "OrderedDict[str, Tuple[pd.DataFrame, str]]" = OrderedDict()
+        # Listagem dos .xlsx: (mtime_ns do diretório, [arquivos]). Só os nomes
+        # ficam em cache: sobrescrever um arquivo não muda o mtime do diretório,
+        # então o mtime de cada arquivo é lido na hora da escolha
+        self._dir_index_cache: Optional[Tuple[int, List[Path]]] = None
 
     def find_workbook(self, regiao: str) -> Optional[Path]:
-        """Busca workbook de forma otimizada."""
+        """Busca workbook usando a listagem do diretório em cache (por mtime)."""
+        try:
+            dir_mtime = self.xlsx_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+        return self._scan_workbook(regiao, self._dir_index(dir_mtime))
+
+    def _dir_index(self, dir_mtime: int) -> List[Path]:
+        """Lista os .xlsx do diretório (um único scandir por mtime)."""
+        cached = self._dir_index_cache
+        if cached is not None and cached[0] == dir_mtime:
+            return cached[1]
+
+        entries: List[Path] = []
+        try:
+            with os.scandir(self.xlsx_dir) as it:
+                for e in it:
+                    if e.name.startswith("~$") or not fnmatch.fnmatch(e.name, "*.xlsx"):
+                        continue
+                    try:
+                        if e.is_file():
+                            entries.append(Path(e.path))
+                    except OSError:
+                        continue
+        except OSError:
+            return []
+
+        self._dir_index_cache = (dir_mtime, entries)
+        return entries
+
+    @staticmethod
+    def _with_mtimes(paths: List[Path]) -> List[Tuple[Path, float]]:
+        """(arquivo, mtime atual) dos arquivos que ainda existem."""
+        result = []
+        for p in paths:
+            try:
+                result.append((p, p.stat().st_mtime))
+            except OSError:
+                continue
+        return result
+
+    def _scan_workbook(self, regiao: str, index: List[Path]) -> Optional[Path]:
+        """Procura o workbook da região na listagem do diretório."""
         patterns = [
             f"*planilha *Medição Mensal*_{regiao}_*.xlsx",
             f"*Medição Mensal*_{regiao}.xlsx",
             f"*Medição*{regiao}*.xlsx",
         ]
         
-        # Busca direta por padrões
+        # Busca direta por padrões (fnmatch segue a regra de caixa do SO, como glob)
         for pat in patterns:
-            matches = [
-                m for m in self.xlsx_dir.glob(pat) 
-                if not m.name.startswith("~$")
-            ]
+            matches = self._with_mtimes([p for p in index if fnmatch.fnmatch(p.name, pat)])
             if matches:
-                # Ordena por modificação (mais recente primeiro)
-                matches.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-                return matches[0]
+                # Mais recente primeiro
+                return max(matches, key=lambda e: e[1])[0]
         
         # Fallback: busca em todos os .xlsx
         target = f"Faturamento {regiao}".lower().strip()
-        candidates = [
-            p for p in self.xlsx_dir.glob("*.xlsx") 
-            if not p.name.startswith("~$")
-        ]
-        
-        for p in candidates:
+        for p, mtime in self._with_mtimes(index):
             try:
                 # Usa cache se possível
-                sheet_names = self._get_sheet_names(p)
-                for s in sheet_names:
-                    if s.lower().strip() == target or target in s.lower().strip():
-                        return p
+                if self._match_sheet(p, target, mtime) is not None:
+                    return p
             except Exception:
                 continue
         
         return None
 
     @lru_cache(maxsize=10)
-    def _get_sheet_names(self, path: Path) -> Tuple[str, ...]:
-        """Obtém nomes de abas com cache."""
+    def _get_sheet_names(self, path: Path, mtime: float) -> Tuple[str, ...]:
+        """Obtém nomes de abas com cache (mtime invalida arquivos alterados)."""
+        names = _list_sheets_fast(path)
+        if names is not None:
+            return names
+        if CalamineWorkbook is not None:
+            try:
+                return tuple(CalamineWorkbook.from_path(str(path)).sheet_names)
+            except Exception:
+                pass  # fallback para openpyxl
         try:
-            xl = pd.ExcelFile(path)
-            return tuple(xl.sheet_names)
+            wb = openpyxl.load_workbook(
+                path, read_only=True, data_only=True, keep_links=False
+            )
+            try:
+                return tuple(wb.sheetnames)
+            finally:
+                wb.close()
         except Exception:
             return tuple()
 
+    @lru_cache(maxsize=10)
+    def _get_sheet_index(
+        self, path: Path, mtime: float
+    ) -> Tuple[Dict[str, str], Tuple[Tuple[str, str], ...]]:
+        """Índice das abas: mapa normalizado (lower/strip) -> nome original e
+        pares (normalizado, original) na ordem do workbook para busca parcial."""
+        sheet_map: Dict[str, str] = {}
+        items = []
+        for s in self._get_sheet_names(path, mtime):
+            norm = s.lower().strip()
+            sheet_map.setdefault(norm, s)
+            items.append((norm, s))
+        return sheet_map, tuple(items)
+
+    def _match_sheet(
+        self, path: Path, target: str, mtime: float
+    ) -> Optional[str]:
+        """Encontra a aba com nome igual a target (ou que o contenha)."""
+        sheet_map, items = self._get_sheet_index(path, mtime)
+        sheet_name = sheet_map.get(target)
+        if sheet_name is not None:
+            return sheet_name
+        return next((original for norm, original in items if target in norm), None)
+
+    @staticmethod
+    def _read_sheet(
+        path: Path,
+        sheet_name: str,
+        usecols: Optional[List[int]] = None,
+        nrows: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Lê uma aba com calamine, caindo para openpyxl se falhar."""
+        if CalamineWorkbook is not None:
+            try:
+                return pd.read_excel(
+                    path,
+                    sheet_name=sheet_name,
+                    dtype=object,
+                    usecols=usecols,
+                    nrows=nrows,
+                    engine="calamine"
+                )
+            except Exception:
+                pass  # arquivo não suportado pelo calamine
+        # read_only evita carregar o workbook inteiro em memória
+        wb = openpyxl.load_workbook(
+            path, read_only=True, data_only=True, keep_links=False
+        )
+        try:
+            return pd.read_excel(
+                wb,
+                sheet_name=sheet_name,
+                dtype=object,
+                usecols=usecols,
+                nrows=nrows,
+                engine="openpyxl"
+            )
+        finally:
+            wb.close()  # libera o handle do ZIP
+
+    @staticmethod
+    def _clean_header(c) -> str:
+        """Normaliza espaços (NBSP, quebras de linha, &nbsp;) do cabeçalho."""
+        return HEADER_CLEANUP.sub(
+            " ", str(c).translate(HEADER_TRANSLATE).replace("&nbsp;", " ")
+        ).strip()
+
+    def _column_indices(
+        self, path: Path, sheet_name: str, columns: Sequence[str]
+    ) -> Optional[List[int]]:
+        """Posições das colunas pedidas, lendo só a linha de cabeçalho.
+        
+        Retorna None (ler tudo) se nenhuma coluna pedida existir na aba.
+        """
+        wanted = {self._clean_header(c).lower() for c in columns}
+        header = self._read_sheet(path, sheet_name, nrows=0).columns
+        indices = [
+            i for i, c in enumerate(header)
+            if self._clean_header(c).lower() in wanted
+        ]
+        return indices or None
+
     def read_region_sheet(
         self, 
         path: Path, 
         regiao: str,
-        use_cache: bool = True
+        use_cache: bool = True,
+        columns: Optional[Sequence[str]] = None
     ) -> Tuple[pd.DataFrame, str]:
-        """Lê aba regional de forma otimizada."""
+        """Lê aba regional de forma otimizada.
         
-        # Cache key
-        cache_key = f"{path}:{regiao}"
-        if use_cache and cache_key in self._sheet_cache:
-            return self._sheet_cache[cache_key]
+        Args:
+            path: Workbook da região
+            regiao: Região (aba 'Faturamento <regiao>')
+            use_cache: Usa/atualiza o cache L1/L2
+            columns: Se informado, lê apenas essas colunas (comparação
+                sem diferenciar maiúsculas); nomes ausentes são ignorados
+        """
         
-        target = f"Faturamento {regiao}".lower().strip()
-        sheet_names = self._get_sheet_names(path)
+        # Cache key: caminho + região + mtime do arquivo (+ colunas pedidas)
+        mtime = path.stat().st_mtime
+        cache_key = f"{path}:{regiao}:{mtime}"
+        if columns:
+            cols_key = "\x1f".join(sorted({str(c) for c in columns}))
+            cache_key += ":" + hashlib.blake2b(
+                cols_key.encode(), digest_size=8
+            ).hexdigest()
+        if use_cache:
+            cached = self._sheet_cache.get(cache_key)
+            if cached is not None:
+                self._sheet_cache.move_to_end(cache_key)
+                return cached
+            if self.cache is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self._remember_sheet(cache_key, cached)
+                    return cached
         
-        sheet_name = None
-        for s in sheet_names:
-            if s.lower().strip() == target or target in s.lower().strip():
-                sheet_name = s
-                break
+        target = f"Faturamento {regiao}".lower().strip()
+        sheet_name = self._match_sheet(path, target, mtime)
         
         if sheet_name is None:
             raise RuntimeError(
                 f"Aba 'Faturamento {regiao}' não encontrada em {path.name}. "
-                f"Abas: {list(sheet_names)}"
+                f"Abas: {list(self._get_sheet_names(path, mtime))}"
             )
 
-        # Leitura otimizada do Excel
-        df = pd.read_excel(
-            path, 
-            sheet_name=sheet_name, 
-            dtype=object,
-            engine='openpyxl'  # Engine mais rápida
+        # Leitura otimizada do Excel (só as colunas pedidas, se houver)
+        usecols = (
+            self._column_indices(path, sheet_name, columns) if columns else None
         )
+        df = self._read_sheet(path, sheet_name, usecols=usecols)
 
-        # Limpeza de cabeçalhos (vetorizada)
-        df.columns = [
-            HEADER_CLEANUP.sub(" ", str(c).replace("\u00A0", " ").replace("&nbsp;", " ").replace("\r", " ").replace("\n", " ")).strip()
-            for c in df.columns
-        ]
+        # Limpeza de cabeçalhos (poucas colunas: list comp supera o .str)
+        df.columns = [self._clean_header(c) for c in df.columns]
 
-        # Limpeza de valores (vetorizada quando possível)
-        for c in df.columns:
-            # Usa vectorized operations do pandas
-            df[c] = df[c].fillna("").astype(str).str.strip()
+        # Limpeza de valores em uma única passada (sem um Series por coluna)
+        values = df.to_numpy(dtype=object, na_value="")
+        df = pd.DataFrame(
+            CELL_CLEANUP(values), index=df.index, columns=df.columns
+        )
         
         result = (df, sheet_name)
         
-        # Armazena no cache
+        # Armazena no cache (L1 + L2)
         if use_cache:
-            self._sheet_cache[cache_key] = result
+            self._remember_sheet(cache_key, result)
+            if self.cache is not None:
+                self.cache.set(cache_key, result)
         
         return result
 
+    def _remember_sheet(self, key: str, result: Tuple[pd.DataFrame, str]):
+        """Insere no LRU em memória, descartando a aba menos usada."""
+        self._sheet_cache[key] = result
+        self._sheet_cache.move_to_end(key)
+        while len(self._sheet_cache) > self._max_cached_sheets:
+            self._sheet_cache.popitem(last=False)
+
     def clear_cache(self):
         """Limpa cache de sheets."""
         self._sheet_cache.clear()
\ No newline at end of file
@@ -1,15 +1,30 @@
 # persistent_cache.py — Cache persistente em disco (opcional)
 
+import io
 import pickle
-import json
+import sqlite3
 from pathlib import Path
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 import hashlib
+import time
+
+import pandas as pd
+
+# Intervalo máximo entre commits dentro de um lote
+FLUSH_INTERVAL_SECONDS = 5.0
 
 
 class PersistentCache:
-    """Cache persistente em disco com expiração."""
+    """Cache persistente em disco (arquivo SQLite único) com expiração.
+    
+    Cada entrada é uma linha da tabela ``cache``: consultas, limpeza e
+    estatísticas viram uma query indexada, sem stat()/unlink() por arquivo.
+    
+    Fora de um bloco ``with`` cada alteração é commitada na hora.
+    Dentro de ``with cache:`` as alterações são agrupadas em uma transação
+    commitada no ``__exit__`` (ou a cada FLUSH_INTERVAL_SECONDS em lotes longos).
+    """
     
     def __init__(self, cache_dir: Path, ttl_hours: int = 24):
         """
@@ -20,31 +35,100 @@ class PersistentCache:
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.ttl = timedelta(hours=ttl_hours)
-        self.metadata_file = self.cache_dir / "_metadata.json"
-        self._load_metadata()
+        self.db_file = self.cache_dir / "cache.sqlite3"
+        self._dirty = False
+        self._batch_depth = 0
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._init_db()
     
-    def _load_metadata(self):
-        """Carrega metadados do cache."""
-        if self.metadata_file.exists():
-            try:
-                with open(self.metadata_file, 'r') as f:
-                    self.metadata = json.load(f)
-            except Exception:
-                self.metadata = {}
-        else:
-            self.metadata = {}
+    def __enter__(self) -> "PersistentCache":
+        self._batch_depth += 1
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush()
+        return False
     
-    def _save_metadata(self):
-        """Salva metadados do cache."""
+    def _init_db(self):
+        """Cria a tabela do cache se necessário."""
         try:
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
+            # WAL permite leituras concorrentes (vários workers do Streamlit)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            pass
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                blob BLOB NOT NULL,
+                format TEXT NOT NULL,
+                sheet_name TEXT,
+                created REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_created ON cache (created)"
+        )
+        self._conn.commit()
+    
+    def _save(self):
+        """Marca alterações pendentes; commita já se não estiver em lote."""
+        self._dirty = True
+        if (
+            self._batch_depth == 0
+            or time.monotonic() - self._last_flush > FLUSH_INTERVAL_SECONDS
+        ):
+            self.flush()
+    
+    def flush(self):
+        """Commita alterações pendentes."""
+        if not self._dirty:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            self._conn.commit()
+            self._dirty = False
         except Exception as e:
-            print(f"Aviso: Não foi possível salvar metadata: {e}")
+            print(f"Aviso: Não foi possível salvar cache: {e}")
+    
+    def close(self):
+        """Commita alterações pendentes e fecha o banco."""
+        self.flush()
+        self._conn.close()
     
     def _make_key(self, key: str) -> str:
-        """Gera hash seguro para usar como nome de arquivo."""
-        return hashlib.md5(key.encode()).hexdigest()
+        """Gera hash de tamanho fixo para usar como chave primária."""
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _serialize(value: Any) -> Tuple[str, bytes, Optional[str]]:
+        """Serializa valor; (DataFrame, aba) vira Feather/zstd, o resto pickle."""
+        if (
+            isinstance(value, tuple)
+            and len(value) == 2
+            and isinstance(value[0], pd.DataFrame)
+            and isinstance(value[1], str)
+        ):
+            try:
+                # Requer pyarrow, índice padrão e nomes de coluna únicos
+                buf = io.BytesIO()
+                value[0].to_feather(buf, compression='zstd')
+                return 'feather', buf.getvalue(), value[1]
+            except Exception:
+                pass
+        return 'pickle', pickle.dumps(value), None
+    
+    @staticmethod
+    def _deserialize(fmt: str, blob: bytes, sheet_name: Optional[str]) -> Any:
+        """Inverso de _serialize."""
+        if fmt == 'feather':
+            return pd.read_feather(io.BytesIO(blob)), sheet_name
+        return pickle.loads(blob)
     
     def get(self, key: str, default: Any = None) -> Any:
         """Recupera valor do cache.
@@ -57,24 +141,34 @@ class PersistentCache:
             Valor armazenado ou default
         """
         file_key = self._make_key(key)
-        cache_file = self.cache_dir / f"{file_key}.pkl"
+        try:
+            row = self._conn.execute(
+                "SELECT blob, format, sheet_name, created FROM cache WHERE key = ?",
+                (file_key,)
+            ).fetchone()
+        except Exception as e:
+            print(f"Aviso: Erro ao carregar cache '{key}': {e}")
+            return default
         
         # Verifica se existe
-        if not cache_file.exists():
+        if row is None:
             return default
         
+        blob, fmt, sheet_name, created = row
+        
         # Verifica expiração
-        if key in self.metadata:
-            created = datetime.fromisoformat(self.metadata[key]['created'])
-            if datetime.now() - created > self.ttl:
-                # Expirado - remove
-                self.delete(key)
-                return default
+        if time.time() - created > self.ttl.total_seconds():
+            # Expirado - remove (chave já calculada)
+            try:
+                if self._delete_no_flush(file_key):
+                    self._save()
+            except Exception as e:
+                print(f"Erro ao deletar cache '{key}': {e}")
+            return default
         
         # Carrega valor
         try:
-            with open(cache_file, 'rb') as f:
-                return pickle.load(f)
+            return self._deserialize(fmt, blob, sheet_name)
         except Exception as e:
             print(f"Aviso: Erro ao carregar cache '{key}': {e}")
             return default
@@ -89,38 +183,31 @@ class PersistentCache:
         Returns:
             True se sucesso
         """
-        file_key = self._make_key(key)
-        cache_file = self.cache_dir / f"{file_key}.pkl"
-        
         try:
-            # Salva valor
-            with open(cache_file, 'wb') as f:
-                pickle.dump(value, f)
-            
-            # Atualiza metadata
-            self.metadata[key] = {
-                'created': datetime.now().isoformat(),
-                'file': str(cache_file.name),
-                'size_bytes': cache_file.stat().st_size
-            }
-            self._save_metadata()
-            
+            fmt, blob, sheet_name = self._serialize(value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache "
+                "(key, blob, format, sheet_name, created, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._make_key(key), blob, fmt, sheet_name, time.time(), len(blob))
+            )
+            self._save()
             return True
         except Exception as e:
             print(f"Erro ao salvar cache '{key}': {e}")
             return False
     
+    def _delete_no_flush(self, file_key: str) -> int:
+        """Remove a linha sem commitar; retorna quantas linhas saíram."""
+        return self._conn.execute(
+            "DELETE FROM cache WHERE key = ?", (file_key,)
+        ).rowcount
+
     def delete(self, key: str) -> bool:
         """Remove valor do cache."""
-        file_key = self._make_key(key)
-        cache_file = self.cache_dir / f"{file_key}.pkl"
-        
         try:
-            if cache_file.exists():
-                cache_file.unlink()
-            if key in self.metadata:
-                del self.metadata[key]
-                self._save_metadata()
+            if self._delete_no_flush(self._make_key(key)):
+                self._save()
             return True
         except Exception as e:
             print(f"Erro ao deletar cache '{key}': {e}")
@@ -128,52 +215,51 @@ class PersistentCache:
     
     def clear(self) -> int:
         """Limpa todo o cache."""
-        count = 0
-        for cache_file in self.cache_dir.glob("*.pkl"):
-            try:
-                cache_file.unlink()
-                count += 1
-            except Exception:
-                pass
-        
-        self.metadata.clear()
-        self._save_metadata()
-        return count
+        try:
+            count = self._conn.execute("DELETE FROM cache").rowcount
+            self._save()
+            return count
+        except Exception as e:
+            print(f"Erro ao limpar cache: {e}")
+            return 0
     
     def cleanup_expired(self) -> int:
         """Remove apenas itens expirados."""
-        count = 0
-        now = datetime.now()
-        expired_keys = []
-        
-        for key, meta in self.metadata.items():
-            created = datetime.fromisoformat(meta['created'])
-            if now - created > self.ttl:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            if self.delete(key):
-                count += 1
-        
-        return count
+        cutoff = time.time() - self.ttl.total_seconds()
+        try:
+            count = self._conn.execute(
+                "DELETE FROM cache WHERE created < ?", (cutoff,)
+            ).rowcount
+            if count:
+                self._save()
+            return count
+        except Exception as e:
+            print(f"Erro ao limpar cache expirado: {e}")
+            return 0
     
     def stats(self) -> Dict[str, Any]:
-        """Retorna estatísticas do cache."""
-        total_size = sum(
-            (self.cache_dir / meta['file']).stat().st_size 
-            for meta in self.metadata.values()
-            if (self.cache_dir / meta['file']).exists()
-        )
+        """Retorna estatísticas do cache.
+        
+        Uma única query agregada: tamanho vem da coluna gravada no set()
+        (sem stat() por item) e MIN(created) usa o índice.
+        """
+        try:
+            items, total_size, oldest = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created) FROM cache"
+            ).fetchone()
+        except Exception as e:
+            print(f"Aviso: Não foi possível ler estatísticas do cache: {e}")
+            items, total_size, oldest = 0, 0, None
         
         return {
-            'items': len(self.metadata),
+            'items': items,
             'total_size_mb': total_size / 1024 / 1024,
             'cache_dir': str(self.cache_dir),
             'ttl_hours': self.ttl.total_seconds() / 3600,
-            'oldest_item': min(
-                (datetime.fromisoformat(m['created']) for m in self.metadata.values()),
-                default=None
-            ).isoformat() if self.metadata else None
+            'oldest_item': (
+                datetime.fromtimestamp(oldest).isoformat()
+                if oldest is not None else None
+            )
         }
 
 
@@ -182,7 +268,7 @@ class CachedExtractor:
     """Extractor com cache persistente em disco."""
     
     def __init__(self, xlsx_dir: Path, cache_dir: Optional[Path] = None):
-        from extractor_optimized import Extractor
+        from extractor import Extractor
         
         self.extractor = Extractor(xlsx_dir)
         
@@ -191,24 +277,33 @@ class CachedExtractor:
         
         self.cache = PersistentCache(cache_dir, ttl_hours=24)
     
+    def __enter__(self) -> "CachedExtractor":
+        # Agrupa as gravações de metadata de toda a execução
+        self.cache.__enter__()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return self.cache.__exit__(exc_type, exc, tb)
+    
     def read_region_sheet(self, path: Path, regiao: str):
         """Lê sheet com cache persistente."""
         # Chave do cache: caminho + região + mtime do arquivo
         mtime = path.stat().st_mtime
         cache_key = f"{path}:{regiao}:{mtime}"
         
-        # Tenta recuperar do cache
-        cached = self.cache.get(cache_key)
-        if cached is not None:
-            print(f"✓ Cache hit: {path.name} - {regiao}")
-            return cached
-        
-        # Cache miss - lê do Excel
-        print(f"↻ Cache miss: {path.name} - {regiao} (lendo...)")
-        result = self.extractor.read_region_sheet(path, regiao, use_cache=False)
-        
-        # Armazena no cache
-        self.cache.set(cache_key, result)
+        with self.cache:
+            # Tenta recuperar do cache
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"✓ Cache hit: {path.name} - {regiao}")
+                return cached
+            
+            # Cache miss - lê do Excel
+            print(f"↻ Cache miss: {path.name} - {regiao} (lendo...)")
+            result = self.extractor.read_region_sheet(path, regiao, use_cache=False)
+            
+            # Armazena no cache
+            self.cache.set(cache_key, result)
         
         return result
     
@@ -224,5 +319,5 @@ class CachedExtractor:
 
 
 # Uso no main.py:
-# extractor = CachedExtractor(Path(args.xlsx_dir))
-# df, sheet = extractor.read_region_sheet(workbook, args.regiao)
\ No newline at end of file
+# with CachedExtractor(Path(args.xlsx_dir)) as extractor:
+#     df, sheet = extractor.read_region_sheet(workbook, args.regiao)
\ No newline at end of file
@@ -71,6 +71,21 @@ COLUMN_CATEGORIES = {
     ]
 }
 
+# Conjuntos imutáveis para testes de pertinência O(1)
+COLUMN_DEFAULTS_SET = frozenset(COLUMN_DEFAULTS)
+COLUMN_EXTRAS_SET = frozenset(COLUMN_EXTRAS)
+COLUMN_CATEGORY_SETS = {
+    category: frozenset(columns)
+    for category, columns in COLUMN_CATEGORIES.items()
+}
+
+# Coluna -> primeira categoria em que aparece
+COLUMN_TO_CATEGORY = {}
+for _category, _columns in COLUMN_CATEGORIES.items():
+    for _column in _columns:
+        COLUMN_TO_CATEGORY.setdefault(_column, _category)
+del _category, _columns, _column
+
 # Presets de configuração predefinidos
 PRESETS = {
     "Padrão": {
@@ -1,10 +1,13 @@
+import io
+import queue
 import re
 import subprocess
+import threading
 import time
 
 import streamlit as st
 from portal_streamlit.pages import init_page
-from portal_streamlit.utils.pipeline import list_units_for_region, get_regions
+from portal_streamlit.utils.pipeline import list_units_for_region, get_regions, preload_regions
 
 # Inicialização da página (substitui código duplicado)
 config = init_page("Execução do Pipeline", "⚙️")
@@ -13,12 +16,18 @@ config = init_page("Execução do Pipeline", "⚙️")
 st.title("⚙️ Execução do Pipeline")
 
 regioes = get_regions()
+xlsx_dir = config.get("xlsx_dir", "c:/backpperformance/planilhas")
+
 idx_default = regioes.index(config.get("default_regiao", "SP1")) if config.get("default_regiao", "SP1") in regioes else 0
 regiao = st.selectbox("🗺️ Região", options=regioes, index=max(0, idx_default))
 
-unidades_da_regiao = list_units_for_region(config.get("xlsx_dir", "c:/backpperformance/planilhas"), regiao)
+unidades_da_regiao = list_units_for_region(xlsx_dir, regiao)
 unidades_selecionadas = st.multiselect("🏢 Unidades", options=unidades_da_regiao, default=unidades_da_regiao)
 
+# Depois do primeiro render: aquece as demais regiões em segundo plano
+# (uma vez por processo; não bloqueia o script)
+preload_regions(xlsx_dir, regioes)
+
 col1, col2 = st.columns(2)
 with col1:
     envio_real = st.toggle("📧 Envio real via SendGrid", value=False, help="Habilita o envio de e-mails.")
@@ -36,6 +45,25 @@ iniciar = c_btn.button("Executar Pipeline", type="primary", use_container_width=
 c_tot.metric("Total Unidades", len(unidades_selecionadas))
 c_mode.metric("Modo", "Produção" if envio_real else "Dry-Run", delta="SendGrid" if envio_real else "Simulação", delta_color="normal" if envio_real else "off")
 
+# Padrões das linhas do pipeline (erro tem precedência sobre aviso; o
+# início de unidade é verificado independentemente dos dois)
+UNIT_RE = re.compile(r"Processando unidade:?\s*(.+)", re.IGNORECASE)
+ERROR_RE = re.compile(r"\[(ERROR|ERRO)\]", re.IGNORECASE)
+WARN_RE = re.compile(r"\[WARN\]", re.IGNORECASE)
+LINE_BATCH = 500  # máximo de linhas processadas por atualização da UI
+UI_MIN_INTERVAL = 0.1  # segundos entre atualizações da UI (≤10 Hz)
+LOG_MAX_CHARS = 1_000_000  # acima disso, mantém só a metade mais recente do log
+
+
+def _pump_lines(stream, out: "queue.Queue"):
+    """Lê o stream em background e entrega as linhas na fila (None = fim)."""
+    try:
+        for line in stream:
+            out.put(line)
+    finally:
+        out.put(None)
+
+
 # --- LÓGICA DE EXECUÇÃO ---
 if iniciar:
     if not unidades_selecionadas:
@@ -51,7 +79,7 @@ if iniciar:
         config.get("main_py_path", "c:/backpperformance/main.py"),
         "--regiao", regiao,
         "--mes", config.get("default_mes", "2025-08"),
-        "--xlsx-dir", config.get("xlsx_dir", "c:/backpperformance/planilhas"),
+        "--xlsx-dir", xlsx_dir,
         "--non-interactive",
     ]
     
@@ -91,17 +119,25 @@ if iniciar:
         warnings_count = 0
         current_unit = "Iniciando..."
         
-        full_logs = []
-
-        # Regex otimizados
-        re_unit_start = re.compile(r"Processando unidade:?\s*(.+)", re.IGNORECASE)
-        re_error = re.compile(r"\[(ERROR|ERRO)\]", re.IGNORECASE)
-        re_warn = re.compile(r"\[WARN\]", re.IGNORECASE)
+        full_logs = io.StringIO()
 
         start_time = time.time()
+        ui_state = {"last": 0.0}
+
+        def update_ui(force: bool = False) -> bool:
+            """Atualiza UI com progresso atual (no máximo a cada UI_MIN_INTERVAL).
+
+            Retorna False se a atualização foi descartada pelo limite de taxa.
+            """
+            now = time.monotonic()
+            if (
+                not force
+                and processed_count < total_units
+                and now - ui_state["last"] < UI_MIN_INTERVAL
+            ):
+                return False
+            ui_state["last"] = now
 
-        def update_ui():
-            """Atualiza UI com progresso atual."""
             # Garante que contador nunca excede total
             display_count = min(processed_count, total_units)
             progress_pct = min(processed_count / total_units, 1.0) if total_units > 0 else 0
@@ -121,26 +157,56 @@ if iniciar:
             
             # Progress bar simples (só porcentagem)
             progress_placeholder.progress(progress_pct)
+            return True
 
-        update_ui()
+        update_ui(force=True)
+
+        # Leitura do subprocesso fora da thread da UI (stderr também, evitando
+        # travar o processo com o pipe cheio)
+        line_queue: "queue.Queue" = queue.Queue(maxsize=1000)
+        stderr_chunks = []
+        threading.Thread(target=_pump_lines, args=(process.stdout, line_queue), daemon=True).start()
+        stderr_thread = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+        )
+        stderr_thread.start()
+
+        finished = False
+        ui_pending = False  # mudança de unidade ainda não exibida
+        while not finished:
+            try:
+                batch = [line_queue.get(timeout=UI_MIN_INTERVAL)]
+            except queue.Empty:
+                batch = []  # sem linhas novas: só exibe o que ficou pendente
+            # Drena o que já chegou: a UI é atualizada uma vez por lote
+            while batch and len(batch) < LINE_BATCH:
+                try:
+                    batch.append(line_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for line in batch:
+                if line is None:
+                    finished = True
+                    break
 
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            
-            if line:
                 clean_line = line.strip()
-                full_logs.append(clean_line)
-                
+                full_logs.write(clean_line)
+                full_logs.write("\n")
+                if full_logs.tell() > LOG_MAX_CHARS:
+                    tail = full_logs.getvalue()[-(LOG_MAX_CHARS // 2):]
+                    full_logs = io.StringIO()
+                    full_logs.write("[...] log truncado\n")
+                    full_logs.write(tail)
+
                 # Conta erros e warnings
-                if re_error.search(clean_line):
+                if ERROR_RE.search(clean_line):
                     errors_count += 1
-                elif re_warn.search(clean_line):
+                elif WARN_RE.search(clean_line):
                     warnings_count += 1
 
                 # ✅ CORRIGIDO: Detecta mudança de unidade e marca anterior como concluída
-                match_unit = re_unit_start.search(clean_line)
+                match_unit = UNIT_RE.search(clean_line)
                 if match_unit:
                     new_unit = match_unit.group(1).strip()
                     
@@ -153,25 +219,27 @@ if iniciar:
                         
                         # Atualiza para nova unidade
                         current_unit = new_unit
-                        
-                        # Atualiza UI
-                        update_ui()
-                        
-                        # Atualiza status container
-                        status_container.update(
-                            label=f"🚀 Executando pipeline... ({processed_count}/{total_units})",
-                            state="running",
-                            expanded=True,
-                        )
+                        ui_pending = True
+
+            # Atualiza UI e status container (juntos, com limite de taxa)
+            if ui_pending and update_ui():
+                ui_pending = False
+                status_container.update(
+                    label=f"🚀 Executando pipeline... ({processed_count}/{total_units})",
+                    state="running",
+                    expanded=True,
+                )
 
         # ✅ Marca última unidade como concluída
         if current_unit and current_unit != "Iniciando...":
             processed_units.add(current_unit)
             processed_count = len(processed_units)
+        update_ui(force=True)
         
         # Captura stderr final se houver falha catastrófica
-        stderr_output = process.stderr.read()
         returncode = process.wait()
+        stderr_thread.join()
+        stderr_output = "".join(stderr_chunks)
         end_time = time.time()
         duration = end_time - start_time
 
@@ -189,4 +257,4 @@ if iniciar:
         st.code(stderr_output)
 
     with st.expander("📄 Ver Logs Completos (Texto Puro)"):
-        st.text("\n".join(full_logs))
+        st.text(full_logs.getvalue())
@@ -3,8 +3,8 @@ Página de Configurações - Versão Refatorada
 Usa arquitetura de serviços e componentes reutilizáveis.
 """
 import streamlit as st
-from portal_streamlit.pages import init_page
-from portal_streamlit.services import ConfigService, ColumnManager
+from portal_streamlit.pages import init_page, gc_paused
+from portal_streamlit.services import get_config_service, get_column_manager
 from portal_streamlit.utils.pipeline import get_regions, list_units_for_region
 from portal_streamlit.utils.validators import ConfigValidator
 from portal_streamlit.utils.ui import (
@@ -21,9 +21,37 @@ from portal_streamlit.constants import PRESETS
 
 config = init_page("Configurações", "🛠️")
 
-# Instancia serviços
-config_service = ConfigService()
-column_manager = ColumnManager()
+# Serviços (instâncias únicas, reaproveitadas entre reruns)
+config_service = get_config_service()
+column_manager = get_column_manager()
+
+
+# Callbacks dos botões: alteram o session_state antes do rerun natural do
+# clique (sem st.rerun(), que executaria a página duas vezes)
+def _apply_columns(columns, message=None, slot=None):
+    st.session_state["selected_columns"] = list(columns)
+    if message and slot:
+        st.session_state[f"cfg_flash_{slot}"] = message
+
+
+def _copy_config(source_unit, source_config):
+    _apply_columns(
+        source_config.get("columns", []),
+        f"✅ Configuração copiada de '{source_unit}'!",
+        "copy"
+    )
+    st.session_state["copied_month"] = source_config.get("month_reference")
+
+
+def _reset_selection():
+    st.session_state.pop("selected_columns", None)
+
+
+def _show_flash(slot):
+    message = st.session_state.pop(f"cfg_flash_{slot}", None)
+    if message:
+        st.success(message)
+
 
 st.title("⚙️ Configurações")
 st.caption("Configure colunas de relatórios e mês de referência por unidade, região ou globalmente")
@@ -92,66 +120,98 @@ if unidade:
         
         if preset_name:
             # Usuário selecionou um preset
-            if st.button(f"✓ Aplicar Template '{preset_name}'", key="apply_preset"):
-                selected_columns = preset_data["columns"].copy()
-                st.session_state["selected_columns"] = selected_columns
-                st.success(f"✅ Template '{preset_name}' aplicado! ({len(selected_columns)} colunas)")
-                st.rerun()
+            st.button(
+                f"✓ Aplicar Template '{preset_name}'",
+                key="apply_preset",
+                on_click=_apply_columns,
+                args=(
+                    preset_data["columns"],
+                    f"✅ Template '{preset_name}' aplicado! ({len(preset_data['columns'])} colunas)",
+                    "preset"
+                )
+            )
+            _show_flash("preset")
         else:
             st.info("ℹ️ Selecione um template acima ou configure manualmente na aba 'Configuração Manual'")
     
     # ------------------------------------------------------------------------
     # TAB 2: Configuração Manual
     # ------------------------------------------------------------------------
-    with tab2:
+    with tab2, gc_paused():
         st.markdown("### 📊 Configuração Manual de Colunas")
         
-        # Busca de colunas
-        search_term = st.text_input(
-            "🔍 Buscar coluna",
-            placeholder="Digite para filtrar colunas...",
-            key="column_search"
-        )
+        # Busca de colunas (em form: filtra só ao enviar, não a cada tecla)
+        with st.form("col_search_form", clear_on_submit=False):
+            search_term = st.text_input(
+                "🔍 Buscar coluna",
+                placeholder="Digite para filtrar colunas...",
+                key="column_search"
+            )
+            submitted = st.form_submit_button("Filtrar")
         
         # Inicializa seleção se não existir
         if "selected_columns" not in st.session_state:
-            st.session_state["selected_columns"] = current_columns.copy()
+            st.session_state["selected_columns"] = list(current_columns)
         
-        # Filtra colunas por busca
+        # Filtra colunas por busca (reaproveita o último resultado entre reruns;
+        # reenviar o mesmo termo não refaz o filtro)
         all_columns = column_manager.get_all_columns()
-        if search_term:
-            filtered_columns = column_manager.filter_columns(search_term)
-        else:
-            filtered_columns = all_columns
+        if "filtered_columns" not in st.session_state or (
+            submitted and search_term != st.session_state.get("last_search_term")
+        ):
+            st.session_state["last_search_term"] = search_term
+            if search_term:
+                st.session_state["filtered_columns"] = column_manager.filter_columns(search_term)
+            else:
+                st.session_state["filtered_columns"] = all_columns
+        filtered_columns = st.session_state["filtered_columns"]
         
         # Botões de seleção em massa
         col_actions1, col_actions2 = st.columns(2)
         
         with col_actions1:
-            if st.button("✓ Selecionar Todas", key="select_all_cols", use_container_width=True):
-                st.session_state["selected_columns"] = filtered_columns.copy()
-                st.rerun()
+            st.button(
+                "✓ Selecionar Todas",
+                key="select_all_cols",
+                use_container_width=True,
+                on_click=_apply_columns,
+                args=(filtered_columns,)
+            )
         
         with col_actions2:
-            if st.button("✗ Desmarcar Todas", key="deselect_all_cols", use_container_width=True):
-                st.session_state["selected_columns"] = []
-                st.rerun()
+            st.button(
+                "✗ Desmarcar Todas",
+                key="deselect_all_cols",
+                use_container_width=True,
+                on_click=_apply_columns,
+                args=([],)
+            )
         
         st.divider()
         
-        # Lista simples de checkboxes
-        for col in filtered_columns:
-            is_selected = col in st.session_state["selected_columns"]
-            checked = st.checkbox(
-                col,
-                value=is_selected,
-                key=f"col_{col}"
-            )
-            
-            if checked and not is_selected:
-                st.session_state["selected_columns"].append(col)
-            elif not checked and is_selected:
-                st.session_state["selected_columns"].remove(col)
+        # Um único multiselect no lugar de um checkbox por coluna.
+        # Opções: colunas filtradas + as já selecionadas (o widget exige que
+        # todo valor selecionado esteja entre as opções)
+        selected_set = set(st.session_state["selected_columns"])
+        filtered_set = set(filtered_columns)
+        known_set = set(all_columns)
+        column_options = [
+            c for c in all_columns if c in filtered_set or c in selected_set
+        ] + [c for c in st.session_state["selected_columns"] if c not in known_set]
+        
+        # Sincroniza o widget com a seleção (presets, cópia e botões alteram
+        # "selected_columns" diretamente)
+        st.session_state["cfg_columns_widget"] = list(st.session_state["selected_columns"])
+        
+        def _sync_selected_columns():
+            st.session_state["selected_columns"] = list(st.session_state["cfg_columns_widget"])
+        
+        st.multiselect(
+            "Selecione as colunas",
+            options=column_options,
+            key="cfg_columns_widget",
+            on_change=_sync_selected_columns
+        )
         
         # Resumo das colunas selecionadas
         st.divider()
@@ -178,11 +238,13 @@ if unidade:
                 st.markdown("#### Preview da Configuração:")
                 render_config_summary(source_config, column_manager)
                 
-                if st.button(f"✓ Copiar de '{source_unit}'", key="copy_config_btn"):
-                    st.session_state["selected_columns"] = source_config.get("columns", []).copy()
-                    st.session_state["copied_month"] = source_config.get("month_reference")
-                    st.success(f"✅ Configuração copiada de '{source_unit}'!")
-                    st.rerun()
+                st.button(
+                    f"✓ Copiar de '{source_unit}'",
+                    key="copy_config_btn",
+                    on_click=_copy_config,
+                    args=(source_unit, source_config)
+                )
+                _show_flash("copy")
     
     # ========================================================================
     # Configuração de Mês (fora das tabs)
@@ -225,10 +287,18 @@ if unidade:
     st.divider()
     st.markdown("### 👁️ Preview da Configuração")
     
-    # Monta configuração para preview
+    # Monta configuração para preview (estatísticas só recalculadas quando
+    # colunas ou mês mudam)
+    preview_columns = st.session_state.get("selected_columns", [])
+    preview_key = (tuple(preview_columns), mes)
+    if st.session_state.get("_preview_key") != preview_key:
+        st.session_state["_preview_key"] = preview_key
+        st.session_state["_preview_stats"] = column_manager.get_column_stats(preview_columns)
+    
     preview_config = {
-        "columns": st.session_state.get("selected_columns", []),
-        "month_reference": mes
+        "columns": preview_columns,
+        "month_reference": mes,
+        "_cached_stats": st.session_state["_preview_stats"]
     }
     
     render_config_summary(preview_config, column_manager)
@@ -261,13 +331,10 @@ if unidade:
                     targets = list_units_for_region(xlsx_dir, regiao) or []
                 else:  # Todas as unidades
                     targets = []
-                    for r in get_regions():
+                    for r in regioes:
                         units_r = list_units_for_region(xlsx_dir, r) or []
                         targets.extend(units_r)
                 
-                # Remove duplicatas
-                targets = list(dict.fromkeys(targets))
-                
                 # Aplica configuração
                 success, message = config_service.apply_config_to_units(
                     config_data,
@@ -293,10 +360,7 @@ if unidade:
                     st.error(f"❌ {message}")
     
     with col_save2:
-        if st.button("🔄 Resetar", use_container_width=True):
-            if "selected_columns" in st.session_state:
-                del st.session_state["selected_columns"]
-            st.rerun()
+        st.button("🔄 Resetar", use_container_width=True, on_click=_reset_selection)
     
     # ========================================================================
     # Estatísticas (opcional, no final)
@@ -4,6 +4,10 @@ Portal Streamlit - Páginas - Funções Comuns
 Utilitários compartilhados para inicialização de páginas.
 """
 
+import gc
+import threading
+from contextlib import contextmanager
+
 import streamlit as st
 from portal_streamlit.utils.ui import inject_global_styles, render_sidebar_branding
 from portal_streamlit.utils.config_manager import get_config
@@ -36,3 +40,42 @@ def init_page(title: str, icon: str, layout: str = "wide"):
     inject_global_styles()
     render_sidebar_branding()
     return get_config()
+
+
+# Controle do GC compartilhado entre sessões (o Streamlit roda cada sessão
+# em uma thread, e gc.disable() vale para o processo inteiro)
+_gc_lock = threading.Lock()
+_gc_depth = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspende o GC cíclico durante um bloco de renderização.
+    
+    Renderizar muitos widgets cria muitos objetos de vida curta, o que
+    dispara coletas no meio do loop. O GC volta ao estado anterior quando
+    o último bloco ativo termina (mesmo com st.stop()/st.rerun()), seguido
+    de uma coleta da geração jovem.
+    
+    Example:
+        ```python
+        with tab2, gc_paused():
+            ...
+        ```
+    """
+    global _gc_depth, _gc_was_enabled
+    with _gc_lock:
+        if _gc_depth == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_depth += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_depth -= 1
+            if _gc_depth == 0 and _gc_was_enabled:
+                gc.enable()
+                gc.collect(0)
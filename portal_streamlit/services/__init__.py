@@ -1,6 +1,6 @@
 """Inicialização do pacote de serviços."""
 
-from portal_streamlit.services.column_manager import ColumnManager
-from portal_streamlit.services.config_service import ConfigService
+from portal_streamlit.services.column_manager import ColumnManager, get_column_manager
+from portal_streamlit.services.config_service import ConfigService, get_config_service
 
-__all__ = ["ColumnManager", "ConfigService"]
+__all__ = ["ColumnManager", "ConfigService", "get_column_manager", "get_config_service"]
@@ -2,43 +2,72 @@
 Gerenciador de colunas para relatórios.
 Fornece funcionalidades para manipular, validar e categorizar colunas.
 """
-from typing import Dict, List, Optional, Set
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+import streamlit as st
+
 from portal_streamlit.constants import (
     COLUMN_DEFAULTS,
     COLUMN_EXTRAS,
-    COLUMN_CATEGORIES
+    COLUMN_CATEGORIES,
+    COLUMN_DEFAULTS_SET,
+    COLUMN_EXTRAS_SET,
+    COLUMN_CATEGORY_SETS,
+    COLUMN_TO_CATEGORY
 )
 
 
+@lru_cache(maxsize=256)
+def _filter(
+    term_lower: str, columns: Tuple[str, ...], columns_lower: Tuple[str, ...]
+) -> Tuple[str, ...]:
+    """Busca memoizada: reruns com o mesmo termo não refazem a varredura."""
+    return tuple(
+        col for col, col_lower in zip(columns, columns_lower)
+        if term_lower in col_lower
+    )
+
+
 class ColumnManager:
-    """Gerenciador centralizado para manipulação de colunas de relatório."""
+    """Gerenciador centralizado para manipulação de colunas de relatório.
+    
+    Os getters devolvem tuplas imutáveis compartilhadas (sem cópia por
+    chamada); quem precisar alterar deve converter com list().
+    """
     
     def __init__(self):
         self._all_columns = COLUMN_DEFAULTS + COLUMN_EXTRAS
         self._column_set = set(self._all_columns)
+        # Nomes (e versão em minúsculas) como tuplas: chave do cache de busca
+        self._all_columns_t = tuple(self._all_columns)
+        self._all_columns_lower = tuple(col.lower() for col in self._all_columns)
+        self._defaults_t = tuple(COLUMN_DEFAULTS)
+        self._extras_t = tuple(COLUMN_EXTRAS)
+        self._categories_frozen = MappingProxyType(
+            {k: tuple(v) for k, v in COLUMN_CATEGORIES.items()}
+        )
     
-    def get_all_columns(self) -> List[str]:
-        """Retorna lista de todas as colunas disponíveis."""
-        return self._all_columns.copy()
+    def get_all_columns(self) -> Tuple[str, ...]:
+        """Retorna todas as colunas disponíveis (tupla imutável)."""
+        return self._all_columns_t
     
-    def get_default_columns(self) -> List[str]:
-        """Retorna lista de colunas padrão (recomendadas)."""
-        return COLUMN_DEFAULTS.copy()
+    def get_default_columns(self) -> Tuple[str, ...]:
+        """Retorna colunas padrão (recomendadas) (tupla imutável)."""
+        return self._defaults_t
     
-    def get_extra_columns(self) -> List[str]:
-        """Retorna lista de colunas extras (opcionais)."""
-        return COLUMN_EXTRAS.copy()
+    def get_extra_columns(self) -> Tuple[str, ...]:
+        """Retorna colunas extras (opcionais) (tupla imutável)."""
+        return self._extras_t
     
-    def get_column_categories(self) -> Dict[str, List[str]]:
-        """Retorna colunas agrupadas por categoria."""
-        return {k: v.copy() for k, v in COLUMN_CATEGORIES.items()}
+    def get_column_categories(self) -> Mapping[str, Tuple[str, ...]]:
+        """Retorna colunas agrupadas por categoria (mapeamento somente leitura)."""
+        return self._categories_frozen
     
     def get_category_for_column(self, column_name: str) -> Optional[str]:
         """Retorna a categoria de uma coluna específica."""
-        for category, columns in COLUMN_CATEGORIES.items():
-            if column_name in columns:
-                return category
-        return None
+        return COLUMN_TO_CATEGORY.get(column_name)
     
     def validate_columns(self, columns: List[str]) -> tuple[bool, List[str]]:
         """
@@ -67,15 +96,13 @@ class ColumnManager:
             Lista de colunas que correspondem ao termo
         """
         if not search_term:
-            return self._all_columns.copy()
+            return list(self._all_columns_t)
         
-        term_lower = search_term.lower()
-        return [
-            col for col in self._all_columns
-            if term_lower in col.lower()
-        ]
+        return list(_filter(
+            search_term.lower(), self._all_columns_t, self._all_columns_lower
+        ))
     
-    def filter_by_category(self, category: str) -> List[str]:
+    def filter_by_category(self, category: str) -> Tuple[str, ...]:
         """
         Retorna colunas de uma categoria específica.
         
@@ -83,9 +110,9 @@ class ColumnManager:
             category: Nome da categoria
             
         Returns:
-            Lista de colunas da categoria
+            Tupla (imutável) com as colunas da categoria
         """
-        return COLUMN_CATEGORIES.get(category, []).copy()
+        return self._categories_frozen.get(category, ())
     
     def merge_column_sets(self, *column_lists: List[str]) -> List[str]:
         """
@@ -130,11 +157,11 @@ class ColumnManager:
     
     def is_default_column(self, column_name: str) -> bool:
         """Verifica se uma coluna é do tipo padrão."""
-        return column_name in COLUMN_DEFAULTS
+        return column_name in COLUMN_DEFAULTS_SET
     
     def is_extra_column(self, column_name: str) -> bool:
         """Verifica se uma coluna é do tipo extra."""
-        return column_name in COLUMN_EXTRAS
+        return column_name in COLUMN_EXTRAS_SET
     
     def get_column_stats(self, selected_columns: List[str]) -> Dict[str, int]:
         """
@@ -147,12 +174,12 @@ class ColumnManager:
             Dict com estatísticas
         """
         total = len(selected_columns)
-        defaults = sum(1 for col in selected_columns if col in COLUMN_DEFAULTS)
-        extras = sum(1 for col in selected_columns if col in COLUMN_EXTRAS)
+        defaults = sum(1 for col in selected_columns if col in COLUMN_DEFAULTS_SET)
+        extras = sum(1 for col in selected_columns if col in COLUMN_EXTRAS_SET)
         
         # Conta por categoria
         by_category = {}
-        for category, cols in COLUMN_CATEGORIES.items():
+        for category, cols in COLUMN_CATEGORY_SETS.items():
             count = sum(1 for col in selected_columns if col in cols)
             if count > 0:
                 by_category[category] = count
@@ -163,3 +190,9 @@ class ColumnManager:
             "extras": extras,
             "by_category": by_category
         }
+
+
+@st.cache_resource
+def get_column_manager() -> ColumnManager:
+    """Instância única do ColumnManager, reaproveitada entre reruns."""
+    return ColumnManager()
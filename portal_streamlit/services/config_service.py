@@ -2,29 +2,56 @@
 Serviço de configuração centralizado.
 Gerencia presets, validações e aplicação de configurações.
 """
+from collections import deque
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 import json
 import os
+import re
+
+import streamlit as st
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from portal_streamlit.constants import PRESETS, SCOPE_OPTIONS
-from portal_streamlit.services.column_manager import ColumnManager
+from portal_streamlit.services.column_manager import ColumnManager, get_column_manager
 from portal_streamlit.utils.config_manager import (
     get_units_overrides,
-    save_unit_override,
+    save_unit_overrides_bulk,
     get_config,
     save_config
 )
 
+# Formato de mês AAAA-MM (compilado uma vez)
+_MONTH_RE = re.compile(r"^20\d{2}-(0[1-9]|1[0-2])$")
+
+# Histórico (JSONL, um registro por linha): mantém HISTORY_KEEP registros,
+# compactando só quando passa de HISTORY_TRIM_AT (custo amortizado O(1))
+HISTORY_KEEP = 100
+HISTORY_TRIM_AT = 200
+
+
+def _dumps_line(entry: Dict[str, Any]) -> bytes:
+    """Serializa um registro do histórico como uma linha JSONL (UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(entry) + b"\n"
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
 
 class ConfigService:
     """Serviço centralizado para gerenciamento de configurações."""
     
-    def __init__(self):
-        self.column_manager = ColumnManager()
-        self._history_file = os.path.join(
-            os.path.dirname(__file__), "..", "data", "config_history.json"
-        )
+    def __init__(self, column_manager: Optional[ColumnManager] = None):
+        self.column_manager = column_manager or ColumnManager()
+        data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+        self._history_file = os.path.join(data_dir, "config_history.jsonl")
+        self._legacy_history_file = os.path.join(data_dir, "config_history.json")
+        self._history_lines: Optional[int] = None  # contado sob demanda
+        # ((mtime_ns, tamanho), registros) do último get_config_history
+        self._hist_cache: Optional[Tuple[Tuple[int, int], List[Dict[str, Any]]]] = None
     
     def get_column_presets(self) -> Dict[str, Dict[str, Any]]:
         """Retorna todos os presets disponíveis."""
@@ -34,10 +61,10 @@ class ConfigService:
         """Retorna lista de nomes de presets."""
         return list(PRESETS.keys())
     
-    def get_preset_columns(self, preset_name: str) -> Optional[List[str]]:
-        """Retorna as colunas de um preset específico."""
+    def get_preset_columns(self, preset_name: str) -> Optional[Tuple[str, ...]]:
+        """Retorna as colunas de um preset específico (tupla imutável)."""
         preset = PRESETS.get(preset_name)
-        return preset["columns"].copy() if preset else None
+        return tuple(preset["columns"]) if preset else None
     
     def get_preset_description(self, preset_name: str) -> Optional[str]:
         """Retorna a descrição de um preset."""
@@ -95,9 +122,7 @@ class ConfigService:
     
     def _validate_month_format(self, month_str: str) -> bool:
         """Valida formato de mês AAAA-MM."""
-        import re
-        pattern = r"^20\d{2}-(0[1-9]|1[0-2])$"
-        return bool(re.match(pattern, str(month_str).strip()))
+        return bool(_MONTH_RE.match(str(month_str).strip()))
     
     def apply_config_to_units(
         self,
@@ -122,20 +147,14 @@ class ConfigService:
             return False, "Erro de validação: " + "; ".join(errors)
         
         # Remove duplicatas preservando ordem
-        unique_units = []
-        seen = set()
-        for unit in target_units:
-            if unit not in seen:
-                unique_units.append(unit)
-                seen.add(unit)
+        unique_units = list(dict.fromkeys(target_units))
         
         if not unique_units:
             return False, "Nenhuma unidade selecionada"
         
         # Aplica configuração
         try:
-            for unit in unique_units:
-                save_unit_override(unit, config_data)
+            save_unit_overrides_bulk({unit: config_data for unit in unique_units})
             
             # Registra no histórico
             self._log_config_change(
@@ -233,16 +252,19 @@ class ConfigService:
             diff["month_old"] = month1
             diff["month_new"] = month2
         
-        # Compara colunas
-        cols1 = set(config1.get("columns", []))
-        cols2 = set(config2.get("columns", []))
-        diff["columns_added"] = list(cols2 - cols1)
-        diff["columns_removed"] = list(cols1 - cols2)
+        # Compara colunas (listas iguais: nada a montar)
+        cols1 = config1.get("columns", [])
+        cols2 = config2.get("columns", [])
+        if cols1 is not cols2 and cols1 != cols2:
+            set1, set2 = set(cols1), set(cols2)
+            diff["columns_added"] = list(set2 - set1)
+            diff["columns_removed"] = list(set1 - set2)
         
         # Verifica outros campos
-        for key in ["intro", "observation", "subject_template"]:
-            if config1.get(key) != config2.get(key):
-                diff["other_changes"].append(key)
+        if config1 is not config2:
+            for key in ("intro", "observation", "subject_template"):
+                if config1.get(key) != config2.get(key):
+                    diff["other_changes"].append(key)
         
         return diff
     
@@ -253,16 +275,10 @@ class ConfigService:
         config: Dict[str, Any],
         user: str
     ):
-        """Registra mudança de configuração no histórico."""
+        """Registra mudança de configuração no histórico (append em JSONL)."""
         try:
-            # Carrega histórico existente
-            history = []
-            if os.path.exists(self._history_file):
-                with open(self._history_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    history = data.get("history", [])
+            self._migrate_legacy_history()
             
-            # Adiciona novo registro
             entry = {
                 "timestamp": datetime.now().isoformat(),
                 "user": user,
@@ -270,21 +286,48 @@ class ConfigService:
                 "units_affected": units,
                 "config": config
             }
-            history.append(entry)
-            
-            # Mantém apenas últimos 100 registros
-            if len(history) > 100:
-                history = history[-100:]
             
-            # Salva histórico
             os.makedirs(os.path.dirname(self._history_file), exist_ok=True)
-            with open(self._history_file, "w", encoding="utf-8") as f:
-                json.dump({"history": history}, f, ensure_ascii=False, indent=2)
+            with open(self._history_file, "ab") as f:
+                f.write(_dumps_line(entry))
+            
+            if self._history_lines is None:
+                with open(self._history_file, "r", encoding="utf-8") as f:
+                    self._history_lines = sum(1 for _ in f)
+            else:
+                self._history_lines += 1
+            
+            # Mantém apenas os últimos registros
+            if self._history_lines > HISTORY_TRIM_AT:
+                self._trim_history()
                 
         except Exception:
             # Falha silenciosa - histórico é opcional
             pass
     
+    def _trim_history(self):
+        """Reescreve o histórico só com os últimos HISTORY_KEEP registros."""
+        with open(self._history_file, "r", encoding="utf-8") as f:
+            tail = deque(f, maxlen=HISTORY_KEEP)
+        tmp_file = self._history_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.writelines(tail)
+        os.replace(tmp_file, self._history_file)
+        self._history_lines = len(tail)
+    
+    def _migrate_legacy_history(self):
+        """Converte o antigo config_history.json para JSONL (uma única vez)."""
+        if os.path.exists(self._history_file) or not os.path.exists(self._legacy_history_file):
+            return
+        try:
+            with open(self._legacy_history_file, "r", encoding="utf-8") as f:
+                history = json.load(f).get("history", [])
+            with open(self._history_file, "wb") as f:
+                f.writelines(_dumps_line(entry) for entry in history[-HISTORY_KEEP:])
+            os.remove(self._legacy_history_file)
+        except Exception:
+            pass
+    
     def get_config_history(self, limit: int = 20) -> List[Dict[str, Any]]:
         """
         Retorna histórico de mudanças de configuração.
@@ -295,14 +338,26 @@ class ConfigService:
         Returns:
             Lista de registros de histórico
         """
+        if limit <= 0:
+            return []
         try:
-            if not os.path.exists(self._history_file):
+            self._migrate_legacy_history()
+            try:
+                st_ = os.stat(self._history_file)
+            except FileNotFoundError:
                 return []
             
-            with open(self._history_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                history = data.get("history", [])
-                return history[-limit:] if history else []
+            # Arquivo inalterado (mtime + tamanho): reaproveita o último parse
+            signature = (st_.st_mtime_ns, st_.st_size)
+            cached = self._hist_cache
+            if cached is not None and cached[0] == signature:
+                history = cached[1]
+            else:
+                with open(self._history_file, "r", encoding="utf-8") as f:
+                    tail = deque(f, maxlen=HISTORY_TRIM_AT)
+                history = [json.loads(line) for line in tail if line.strip()]
+                self._hist_cache = (signature, history)
+            return history[-limit:]
         except Exception:
             return []
     
@@ -315,18 +370,25 @@ class ConfigService:
         """Retorna estatísticas gerais sobre configurações."""
         overrides = get_units_overrides()
         
-        total_units = len(overrides)
-        units_with_custom_month = sum(
-            1 for cfg in overrides.values()
-            if "month_reference" in cfg
-        )
-        units_with_custom_columns = sum(
-            1 for cfg in overrides.values()
-            if "columns" in cfg
-        )
+        # Uma única passada acumulando os três contadores
+        total_units = 0
+        units_with_custom_month = 0
+        units_with_custom_columns = 0
+        for cfg in overrides.values():
+            total_units += 1
+            if "month_reference" in cfg:
+                units_with_custom_month += 1
+            if "columns" in cfg:
+                units_with_custom_columns += 1
         
         return {
             "total_configured_units": total_units,
             "units_with_custom_month": units_with_custom_month,
             "units_with_custom_columns": units_with_custom_columns
         }
+
+
+@st.cache_resource
+def get_config_service() -> ConfigService:
+    """Instância única do ConfigService, reaproveitada entre reruns."""
+    return ConfigService(get_column_manager())
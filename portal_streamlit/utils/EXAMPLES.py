@@ -91,9 +91,8 @@ from portal_streamlit.utils import ListHelper
 
 # Dividir em chunks (útil para processar em lotes)
 unidades = ["SP1-A", "SP1-B", "SP2-A", "SP2-B", "RJ-A", "RJ-B", "NNE-A"]
-chunks = ListHelper.chunk(unidades, 3)
 print(f"\n📦 Unidades divididas em lotes de 3:")
-for i, chunk in enumerate(chunks, 1):
+for i, chunk in enumerate(ListHelper.chunk_iter(unidades, 3), 1):
     print(f"  Lote {i}: {chunk}")
 
 # Remover duplicatas mantendo ordem
@@ -256,16 +255,13 @@ caminhos = [
 ]
 
 print("\n📁 Validação de caminhos:")
+TIPOS = {"file": " (arquivo)", "dir": " (diretório)"}
 for caminho in caminhos:
-    exists = PathValidator.exists(caminho)
-    tipo = ""
-    if exists:
-        if PathValidator.is_file(caminho):
-            tipo = " (arquivo)"
-        elif PathValidator.is_directory(caminho):
-            tipo = " (diretório)"
+    # Um único stat por caminho
+    classe = PathValidator.classify(caminho)
+    tipo = TIPOS.get(classe, "")
     
-    status = "✅" if exists else "❌"
+    status = "✅" if classe != "missing" else "❌"
     print(f"  {status} {caminho}{tipo}")
 
 
@@ -17,6 +17,7 @@ from .template_helper import (
     EmailTemplateTagger,
     render_template,
     clean_html,
+    clear_template_cache,
 )
 
 from .email_subject_helper import (
@@ -40,6 +41,7 @@ __all__ = [
     'EmailTemplateTagger',
     'render_template',
     'clean_html',
+    'clear_template_cache',
     # Email subject helpers
     'EmailSubjectHelper',
     'render_email_subject',
@@ -1,7 +1,15 @@
 import json
 import os
+import tempfile
 from typing import Any, Dict
 from dotenv import load_dotenv
+import streamlit as st
+
+try:
+    # Serializador nativo, bem mais rápido que o json da stdlib
+    import orjson
+except ImportError:
+    orjson = None
 
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 CONFIG_DIR = os.path.abspath(CONFIG_DIR)
@@ -37,8 +45,31 @@ def load_json(path: str, default: Any):
 
 def save_json(path: str, data: Any):
     ensure_dirs()
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Grava em arquivo temporário único (por escrita) e troca: leitores nunca
+    # veem JSON pela metade, nem a mistura de duas sessões salvando juntas
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        if orjson is not None:
+            # Mesmo formato legível (indentação 2, UTF-8 sem escapes)
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        try:
+            # mkstemp cria com 0600: mantém as permissões do arquivo atual
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 def get_config() -> Dict[str, Any]:
@@ -54,16 +85,33 @@ def save_config(cfg: Dict[str, Any]):
     save_json(CONFIG_PATH, cfg)
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _overrides_cached(mtime_ns: int) -> Dict[str, Dict[str, Any]]:
+    """Snapshot de overrides.json; o mtime na chave invalida edições externas."""
+    return load_json(OVERRIDES_PATH, DEFAULT_OVERRIDES)
+
+
 def get_units_overrides() -> Dict[str, Dict[str, Any]]:
     ensure_dirs()
-    data = load_json(OVERRIDES_PATH, DEFAULT_OVERRIDES)
-    return data
+    try:
+        mtime_ns = os.stat(OVERRIDES_PATH).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    # st.cache_data devolve uma cópia: o chamador pode alterar à vontade
+    return _overrides_cached(mtime_ns)
 
 
 def save_unit_override(unidade: str, fields: Dict[str, Any]):
+    save_unit_overrides_bulk({unidade: fields})
+
+
+def save_unit_overrides_bulk(updates: Dict[str, Dict[str, Any]]):
+    """Aplica campos em várias unidades com uma única leitura e escrita."""
     overrides = get_units_overrides()
-    overrides.setdefault(unidade, {}).update(fields)
+    for unidade, fields in updates.items():
+        overrides.setdefault(unidade, {}).update(fields)
     save_json(OVERRIDES_PATH, overrides)
+    _overrides_cached.clear()
 
 
 def get_env_variable(key: str, default: str = None) -> str:
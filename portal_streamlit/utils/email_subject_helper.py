@@ -6,9 +6,75 @@ Centraliza lógica de templates de assunto seguindo DRY.
 """
 
 import re
+from functools import lru_cache
 from typing import Dict, Any, Tuple, Optional, List
 
 
+# Regex para encontrar placeholders no formato {nome}
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+
+@lru_cache(maxsize=128)
+def _compile_subject(template: str) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    Decompõe o template em (literais, nomes) uma única vez por conteúdo.
+    
+    Retorna None se o template usa recursos do str.format além de {nome}
+    (chaves escapadas, formatação etc.) - nesse caso renderiza com format().
+    """
+    literals, names = [], []
+    pos = 0
+    for match in _PLACEHOLDER_RE.finditer(template):
+        literals.append(template[pos:match.start()])
+        names.append(match.group(1))
+        pos = match.end()
+    literals.append(template[pos:])
+    if any("{" in lit or "}" in lit for lit in literals):
+        return None
+    return tuple(literals), tuple(names)
+
+
+@lru_cache(maxsize=128)
+def _parsed_template(template: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Extrai e valida os placeholders do template uma única vez por conteúdo.
+    
+    Returns:
+        (placeholders usados, placeholders inválidos)
+    """
+    used = tuple(_PLACEHOLDER_RE.findall(template))
+    valid = EmailSubjectHelper.AVAILABLE_PLACEHOLDERS
+    invalid = tuple(p for p in used if p not in valid)
+    return used, invalid
+
+
+_MESES_PT_BR = (
+    "", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+)
+
+
+@lru_cache(maxsize=128)
+def _format_mes_extenso(ym: str) -> str:
+    """Implementação de EmailSubjectHelper.format_mes_extenso (em cache por ym)."""
+    try:
+        # Aceita formatos YYYY-MM ou YYYY/MM
+        ym_clean = ym.replace("/", "-")
+        parts = ym_clean.split("-")
+        
+        if len(parts) >= 2:
+            year = int(parts[0])
+            month = int(parts[1])
+            
+            if 1 <= month <= 12:
+                return f"{_MESES_PT_BR[month]}/{year}"
+    except (ValueError, IndexError):
+        pass
+    
+    # Fallback se formato inválido
+    return ym
+
+
 class EmailSubjectHelper:
     """
     Helper para gerenciar assuntos de emails com templates e placeholders.
@@ -28,7 +94,7 @@ class EmailSubjectHelper:
     DEFAULT_TEMPLATE = "Medição mensal - {unidade} - {mes_extenso}"
     
     # Regex para encontrar placeholders no formato {nome}
-    PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)\}')
+    PLACEHOLDER_PATTERN = _PLACEHOLDER_RE
     
     @classmethod
     def get_default_template(cls) -> str:
@@ -68,7 +134,7 @@ class EmailSubjectHelper:
         if not template:
             return []
         
-        return cls.PLACEHOLDER_PATTERN.findall(template)
+        return list(_parsed_template(template)[0])
     
     @classmethod
     def validate_template(cls, template: str) -> Tuple[bool, Optional[str]]:
@@ -94,12 +160,8 @@ class EmailSubjectHelper:
         if not template or not isinstance(template, str):
             return False, "Template não pode ser vazio"
         
-        # Extrair placeholders usados
-        used_placeholders = cls.extract_placeholders(template)
-        
-        # Verificar se todos são válidos
-        valid_placeholders = set(cls.AVAILABLE_PLACEHOLDERS.keys())
-        invalid = [p for p in used_placeholders if p not in valid_placeholders]
+        # Placeholders inválidos (parse em cache por template)
+        invalid = _parsed_template(template)[1]
         
         if invalid:
             return False, f"Placeholder(s) inválido(s): {', '.join(invalid)}"
@@ -138,15 +200,24 @@ class EmailSubjectHelper:
         if not template:
             template = cls.DEFAULT_TEMPLATE
         
-        # Validar template
-        is_valid, error = cls.validate_template(template)
-        if not is_valid and not safe:
+        # Validar template (só interessa quando safe=False)
+        if not safe and _parsed_template(template)[1]:
+            _, error = cls.validate_template(template)
             raise ValueError(f"Template inválido: {error}")
         
         try:
-            # Renderizar usando str.format
-            rendered = template.format(**context)
-            return rendered
+            compiled = _compile_subject(template)
+            if compiled is None:
+                # Renderizar usando str.format
+                return template.format(**context)
+            
+            # Template simples já decomposto: intercala literais e valores
+            literals, names = compiled
+            parts = [literals[0]]
+            for name, literal in zip(names, literals[1:]):
+                parts.append(str(context[name]))
+                parts.append(literal)
+            return "".join(parts)
         except KeyError as e:
             if safe:
                 # Em modo seguro, retorna o template original se falhar
@@ -169,27 +240,7 @@ class EmailSubjectHelper:
             >>> EmailSubjectHelper.format_mes_extenso("2025-11")
             "Novembro/2025"
         """
-        PT_BR = [
-            "", "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-            "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
-        ]
-        
-        try:
-            # Aceita formatos YYYY-MM ou YYYY/MM
-            ym_clean = ym.replace("/", "-")
-            parts = ym_clean.split("-")
-            
-            if len(parts) >= 2:
-                year = int(parts[0])
-                month = int(parts[1])
-                
-                if 1 <= month <= 12:
-                    return f"{PT_BR[month]}/{year}"
-        except (ValueError, IndexError):
-            pass
-        
-        # Fallback se formato inválido
-        return ym
+        return _format_mes_extenso(ym)
     
     @classmethod
     def create_context(
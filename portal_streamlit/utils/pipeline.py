@@ -1,9 +1,12 @@
 import os
+import re
 import sys
+import threading
+import time
 import importlib.util
-from pathlib import Path
-from typing import List, Optional
 from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 # Garante acesso ao projeto raiz (extractor, emailer) e carrega utils.py da raiz
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -11,6 +14,31 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from extractor import Extractor  # type: ignore
+from persistent_cache import PersistentCache  # type: ignore
+from portal_streamlit.constants import COLUMN_DEFAULTS, COLUMN_EXTRAS
+
+# Colunas usadas pelo portal: as demais não são lidas da planilha
+_PORTAL_COLUMNS = tuple(COLUMN_DEFAULTS + COLUMN_EXTRAS)
+
+# Cache em disco das abas lidas, compartilhado entre processos
+_SHEET_CACHE_DIR = PROJECT_ROOT / ".cache" / "sheets"
+
+# Cache de unidades: (dir, região, mtime_ns do workbook) -> (instante, unidades)
+_UNITS_TTL = 300.0
+_units_cache: Dict[Tuple[str, str, int], Tuple[float, Tuple[str, ...]]] = {}
+_units_lock = threading.Lock()
+# Um Extractor por diretório, compartilhado entre reruns: memoiza a busca de
+# workbooks e as abas lidas (L1 + cache em disco). Uso serializado pelo lock.
+_extractors: Dict[str, Extractor] = {}
+_extractor_lock = threading.RLock()
+# Diretórios cujo aquecimento em segundo plano já foi iniciado
+_preload_started: Set[str] = set()
+_preload_lock = threading.Lock()
+
+# Valores da coluna de unidade que não representam uma unidade
+_INVALID_UNIT_MARKERS = frozenset({
+    "", "-", "nan", "na", "n/a", "preenchimento pendente", "pendente", "nao informado", "não informado",
+})
 
 # Carrega funções do utils.py da raiz sem colidir com portal_streamlit.utils
 _normalize_unit = None
@@ -38,15 +66,26 @@ def normalize_unit(x: str) -> str:  # type: ignore[override]
             pass
     return str(x).strip()
 
+_YM_RE = re.compile(r"(20\d{2})[-/](1[0-2]|0?[1-9])")
+
+
 def parse_year_month(x: str) -> Optional[str]:  # type: ignore[override]
     if callable(_parse_year_month):
         try:
             return _parse_year_month(x)
         except Exception:
             pass
-    import re
     s = str(x)
-    m = re.search(r"(20\d{2})[-/](0?[1-9]|1[0-2])", s)
+    # Caminho rápido: começa com "20YY-MM" ou "20YY/MM"
+    head = s[:7]
+    if (
+        len(head) == 7 and head.isascii() and head.startswith("20")
+        and head[2:4].isdigit() and head[4] in "-/" and head[5:7].isdigit()
+    ):
+        month = int(head[5:7])
+        if 1 <= month <= 12:
+            return f"{head[:4]}-{month:02d}"
+    m = _YM_RE.search(s)
     if m:
         return f"{m.group(1)}-{int(m.group(2)):02d}"
     return None
@@ -69,51 +108,162 @@ def read_html_file(path: str) -> str:
 
 
 # Constantes privadas
-_REGIOES = ["SP1", "SP2", "SP3", "RJ", "NNE"]
+_REGIOES = ("SP1", "SP2", "SP3", "RJ", "NNE")
 
 
-def get_regions() -> List[str]:
-    """Retorna lista de regiões disponíveis."""
+def get_regions() -> Tuple[str, ...]:
+    """Retorna as regiões disponíveis (tupla imutável compartilhada)."""
     return _REGIOES
 
-@lru_cache(maxsize=64)
+def _warm_regions(xlsx_dir: str, regioes: Tuple[str, ...]) -> None:
+    """Lê as regiões uma a uma, no próprio processo (roda em thread daemon)."""
+    for regiao in regioes:
+        try:
+            list_units_for_region(xlsx_dir, regiao)
+        except Exception:
+            pass
+
+
+def preload_regions(xlsx_dir: str, regioes: Optional[Sequence[str]] = None) -> bool:
+    """Aquece em segundo plano o cache de unidades das regiões.
+
+    Não bloqueia o script: a leitura roda em uma thread daemon do próprio
+    processo, uma vez por diretório. Deve ser chamada depois do primeiro
+    render (a região selecionada continua sendo lida sob demanda).
+
+    Returns:
+        True se o aquecimento foi iniciado nesta chamada
+    """
+    regioes = tuple(regioes or _REGIOES)
+    with _preload_lock:
+        if not regioes or xlsx_dir in _preload_started:
+            return False
+        _preload_started.add(xlsx_dir)
+    threading.Thread(
+        target=_warm_regions, args=(xlsx_dir, regioes),
+        name="portal-preload-regions", daemon=True,
+    ).start()
+    return True
+
+
+def _get_extractor(xlsx_dir: str) -> Extractor:
+    """Extractor do diretório (chamar com _extractor_lock adquirido)."""
+    ex = _extractors.get(xlsx_dir)
+    if ex is None:
+        ex = _extractors[xlsx_dir] = Extractor(
+            Path(xlsx_dir), cache=PersistentCache(_SHEET_CACHE_DIR)
+        )
+    return ex
+
+
+def invalidate_extractor(xlsx_dir: Optional[str] = None) -> None:
+    """Descarta o Extractor do diretório (ou de todos, se None)."""
+    with _extractor_lock:
+        dirs = [xlsx_dir] if xlsx_dir is not None else list(_extractors)
+        for d in dirs:
+            ex = _extractors.pop(d, None)
+            if ex is not None and ex.cache is not None:
+                ex.cache.close()
+
+
+def _find_workbook_cached(xlsx_dir: str, regiao: str) -> Optional[Path]:
+    with _extractor_lock:
+        return _get_extractor(xlsx_dir).find_workbook(regiao)
+
+
+def clear_cache() -> None:
+    """Descarta as unidades e workbooks memorizados."""
+    with _units_lock:
+        _units_cache.clear()
+    with _preload_lock:
+        _preload_started.clear()
+    invalidate_extractor()
+
+
 def list_units_for_region(xlsx_dir: str, regiao: str) -> List[str]:
+    """Unidades da região, em cache enquanto o workbook não mudar (TTL de 5 min)."""
     try:
-        ex = Extractor(Path(xlsx_dir))
-        wb = ex.find_workbook(regiao)
-        if not wb or not wb.exists():
+        wb = _find_workbook_cached(xlsx_dir, regiao)
+        if not wb:
             return []
-        df, _ = ex.read_region_sheet(wb, regiao)
-        # coleta unidades similares ao main.collect_units
-        units = []
-        seen = set()
+        key = (xlsx_dir, regiao, wb.stat().st_mtime_ns)
+    except OSError:
+        return []
+
+    now = time.monotonic()
+    with _units_lock:
+        hit = _units_cache.get(key)
+        if hit is not None and now - hit[0] < _UNITS_TTL:
+            return list(hit[1])
+
+    units = _load_units(xlsx_dir, wb, regiao)
+    if units is None:
+        return []
+
+    with _units_lock:
+        # Remove entradas expiradas ou de versões antigas do workbook
+        for k in [k for k, (t, _) in _units_cache.items()
+                  if now - t >= _UNITS_TTL or k[:2] == key[:2]]:
+            del _units_cache[k]
+        _units_cache[key] = (now, tuple(units))
+    return units
+
+
+def _load_units(xlsx_dir: str, wb: Path, regiao: str) -> Optional[List[str]]:
+    try:
+        with _extractor_lock:
+            df, _ = _get_extractor(xlsx_dir).read_region_sheet(
+                wb, regiao, columns=_PORTAL_COLUMNS
+            )
         # heurística: encontrar coluna de unidade
-        unit_cols = [c for c in df.columns if str(c).strip().lower().startswith("unidade") or "shopping" in str(c).strip().lower()]
-        unit_col = unit_cols[0] if unit_cols else None
-        if not unit_col:
+        unit_col = next(
+            (c for c in df.columns
+             if str(c).strip().lower().startswith("unidade") or "shopping" in str(c).strip().lower()),
+            None,
+        )
+        if unit_col is None:
             return []
-        INVALID_MARKERS = {
-            "", "-", "nan", "na", "n/a", "preenchimento pendente", "pendente", "nao informado", "não informado",
-        }
-        for v in df[unit_col].dropna().astype(str):
-            raw = v.strip()
-            low = raw.lower()
-            if low in INVALID_MARKERS:
+        # coleta unidades similares ao main.collect_units: a aba já vem com
+        # células em str/strip, então basta uma passada sobre a coluna
+        invalid = _INVALID_UNIT_MARKERS
+        norm = normalize_unit
+        units: Dict[str, str] = {}
+        for raw in df[unit_col].tolist():
+            if raw.lower() in invalid:
                 continue
-            nu = normalize_unit(raw)
-            if nu and nu not in seen:
-                seen.add(nu); units.append(raw)
-        units.sort()
-        return units
+            nu = norm(raw)
+            if nu and nu not in units:
+                units[nu] = raw
+        return sorted(units.values())
     except Exception:
-        return []
+        return None
+
+
+# Remove os ASCII que não são alfanuméricos nem "_", "-" ou espaço
+_ASCII_FILENAME_TABLE = str.maketrans("", "", "".join(
+    ch for ch in map(chr, range(128)) if not (ch.isalnum() or ch in "_- ")
+))
 
 
 def sanitize_filename_unit(unidade: str) -> str:
-    s = "".join(ch for ch in unidade if ch.isalnum() or ch in {"_","-"," "}).strip()
+    # Mesmo nome gerado pelo main.py (isalnum aceita letras acentuadas)
+    if unidade.isascii():
+        s = unidade.translate(_ASCII_FILENAME_TABLE).strip()
+    else:
+        s = "".join(ch for ch in unidade if ch.isalnum() or ch in {"_","-"," "}).strip()
     return s.replace(" ", "_")
 
+@lru_cache(maxsize=16)
+def _output_dir_index(output_dir: str, mtime_ns: int) -> frozenset:
+    """Nomes (normcase) dos arquivos do diretório; mtime invalida a entrada."""
+    return frozenset(os.path.normcase(name) for name in os.listdir(output_dir))
+
+
 def find_unit_html(output_dir: str, unidade: str, ym: str) -> Optional[str]:
     base = sanitize_filename_unit(unidade)
-    candidate = os.path.join(output_dir, f"{base}_{ym}.html")
-    return candidate if os.path.exists(candidate) else None
+    fname = f"{base}_{ym}.html"
+    try:
+        names = _output_dir_index(output_dir, os.stat(output_dir).st_mtime_ns)
+    except OSError:
+        return None
+    return os.path.join(output_dir, fname) if os.path.normcase(fname) in names else None
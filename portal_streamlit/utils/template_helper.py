@@ -5,10 +5,107 @@ Funções auxiliares para manipulação de templates HTML e substituição de pl
 Centraliza lógica de renderização de templates evitando duplicação.
 """
 
+import os
 import re
-from typing import Dict, Any, Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, List, Optional, Sequence, Set, Tuple
 from pathlib import Path
 
+try:
+    # Engine Jinja em Rust, usada só para templates com blocos/filtros
+    from minijinja import Environment as _MiniJinjaEnvironment
+except ImportError:
+    _MiniJinjaEnvironment = None
+
+try:
+    # RE2: regex em tempo linear (sem backtracking), opcional
+    import re2 as _re2
+except ImportError:
+    _re2 = None
+
+# RE2 só entra se instalado e habilitado via PORTAL_USE_RE2
+USE_RE2 = _re2 is not None and bool(os.environ.get("PORTAL_USE_RE2"))
+
+# Blocos {% %} ou expressões {{ }} que não são um placeholder simples
+_ADVANCED_PATTERN = re.compile(r'\{%|\{\{(?!\s*\w+\s*\}\})')
+
+_jinja_env = _MiniJinjaEnvironment() if _MiniJinjaEnvironment is not None else None
+# Nomes registrados no ambiente, em ordem LRU (mesmo limite dos lru_cache)
+_JINJA_MAX_TEMPLATES = 256
+_jinja_loaded: "OrderedDict[str, None]" = OrderedDict()
+_jinja_lock = threading.Lock()
+
+
+@lru_cache(maxsize=256)
+def _is_advanced(template: str) -> bool:
+    return _ADVANCED_PATTERN.search(template) is not None
+
+
+def _render_jinja(template: str, context: Dict[str, Any]) -> str:
+    """Renderiza com MiniJinja, registrando o template uma vez por conteúdo."""
+    name = hashlib.blake2b(template.encode("utf-8"), digest_size=16).hexdigest()
+    with _jinja_lock:
+        if name in _jinja_loaded:
+            _jinja_loaded.move_to_end(name)
+        else:
+            _jinja_env.add_template(name, template)
+            _jinja_loaded[name] = None
+            if len(_jinja_loaded) > _JINJA_MAX_TEMPLATES:
+                # Remove do ambiente o template usado há mais tempo
+                evicted, _ = _jinja_loaded.popitem(last=False)
+                _jinja_env.remove_template(evicted)
+        # Renderiza sob o lock: o template não pode ser removido no meio
+        return _jinja_env.render_template(name, **context)
+
+
+@lru_cache(maxsize=256)
+def _compile_template(
+    template: str
+) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Pré-processa um template uma única vez por conteúdo.
+    
+    Returns:
+        (literais, nomes, placeholders originais), com
+        len(literais) == len(nomes) + 1
+    """
+    literals, names, raws = [], [], []
+    pos = 0
+    for match in TemplateRenderer.PLACEHOLDER_PATTERN.finditer(template):
+        literals.append(template[pos:match.start()])
+        names.append(match.group(1))
+        raws.append(match.group(0))
+        pos = match.end()
+    literals.append(template[pos:])
+    return tuple(literals), tuple(names), tuple(raws)
+
+
+@lru_cache(maxsize=64)
+def _scan_placeholders(template: str) -> FrozenSet[str]:
+    """Nomes dos placeholders do template (em cache por conteúdo)."""
+    return frozenset(_compile_template(template)[1])
+
+
+@lru_cache(maxsize=128)
+def _read_template(path: str, mtime_ns: int) -> str:
+    """Conteúdo do arquivo de template (em cache por caminho + mtime)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def clear_template_cache() -> None:
+    """Descarta templates lidos e pré-processados."""
+    _read_template.cache_clear()
+    _compile_template.cache_clear()
+    _scan_placeholders.cache_clear()
+    if _jinja_env is not None:
+        with _jinja_lock:
+            _jinja_env.clear_templates()
+            _jinja_loaded.clear()
+
 
 class TemplateRenderer:
     """
@@ -50,11 +147,17 @@ class TemplateRenderer:
         
         template_path_obj = Path(template_file)
         
-        if not template_path_obj.exists():
+        try:
+            resolved = template_path_obj.resolve()
+            mtime_ns = resolved.stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
             raise FileNotFoundError(f"Template não encontrado: {template_file}")
         
-        with open(template_path_obj, 'r', encoding='utf-8') as f:
-            self._template_cache = f.read()
+        # Cache compartilhado entre instâncias; mtime invalida arquivos alterados
+        self._template_cache = _read_template(str(resolved), mtime_ns)
+        
+        # Já deixa o template decomposto: os renders seguintes não usam regex
+        _compile_template(self._template_cache)
         
         return self._template_cache
     
@@ -85,20 +188,45 @@ class TemplateRenderer:
         if not content:
             raise ValueError("Nenhum template fornecido ou carregado")
         
+        # Sem "{{" (nem "{%" para o MiniJinja) não há o que substituir
+        if '{{' not in content and (_jinja_env is None or '{%' not in content):
+            return content
+        
         context = context or {}
         
-        def replace_placeholder(match):
-            placeholder_name = match.group(1)
-            value = context.get(placeholder_name)
+        # Loops, condições e filtros ficam com o MiniJinja (se instalado)
+        if _jinja_env is not None and _is_advanced(content):
+            try:
+                return _render_jinja(content, context)
+            except Exception:
+                if not safe:
+                    raise
+                # Em modo seguro, segue com a substituição simples
+        
+        # Template já decomposto (cache): só intercala literais e valores
+        literals, names, raws = _compile_template(content)
+        if not names:
+            return content
+        
+        # Converte cada valor para string uma única vez, mesmo se o
+        # placeholder se repete no template (ex: {{ nome }} várias vezes)
+        values = {}
+        for name in _scan_placeholders(content):
+            value = context.get(name)
+            values[name] = None if value is None else str(value)
+        
+        parts = [literals[0]]
+        for name, raw, literal in zip(names, raws, literals[1:]):
+            value = values[name]
             
             # Se safe=True e valor não existe, mantém placeholder original
-            if value is None and safe:
-                return match.group(0)
-            
-            # Converte valor para string
-            return str(value) if value is not None else ""
+            if value is None:
+                parts.append(raw if safe else "")
+            else:
+                parts.append(value)
+            parts.append(literal)
         
-        return self.PLACEHOLDER_PATTERN.sub(replace_placeholder, content)
+        return "".join(parts)
     
     def render_from_file(
         self,
@@ -120,7 +248,35 @@ class TemplateRenderer:
         template = self.load_template(path)
         return self.render(template, context, safe)
     
-    def get_placeholders(self, template: Optional[str] = None) -> set:
+    def render_batch(
+        self,
+        contexts: Sequence[Optional[Dict[str, Any]]],
+        template: Optional[str] = None,
+        safe: bool = True
+    ) -> List[str]:
+        """
+        Renderiza o mesmo template para vários contextos (ex: envio em massa).
+        
+        Roda em sequência: cada render é um split/join em cache (microssegundos),
+        então um pool de processos custaria mais em spawn/IPC do que renderiza.
+        
+        Args:
+            contexts: Um contexto por email
+            template: String do template (usa cached se None)
+            safe: Se True, mantém placeholders não encontrados no contexto
+            
+        Returns:
+            Templates renderizados, na ordem dos contextos
+        """
+        content = template or self._template_cache
+        
+        if not content:
+            raise ValueError("Nenhum template fornecido ou carregado")
+        
+        render = self.render
+        return [render(content, c, safe) for c in contexts]
+    
+    def get_placeholders(self, template: Optional[str] = None) -> Set[str]:
         """
         Extrai todos os placeholders encontrados no template.
         
@@ -137,10 +293,47 @@ class TemplateRenderer:
         """
         content = template or self._template_cache
         
-        if not content:
+        if not content or '{{' not in content:
             return set()
         
-        return {match.group(1) for match in self.PLACEHOLDER_PATTERN.finditer(content)}
+        # Cópia mutável do conjunto em cache (API continua retornando set)
+        return set(_scan_placeholders(content))
+
+
+@lru_cache(maxsize=64)
+def _styles_pattern(tags: FrozenSet[str]) -> "re.Pattern[str]":
+    """Padrão único de add_inline_styles para o conjunto de tags (uma passada)."""
+    alternation = '|'.join(map(re.escape, sorted(tags, key=len, reverse=True)))
+    # (?=(...))\2 emula um grupo atômico: sem '>' a busca falha sem backtracking
+    return re.compile(rf'<({alternation})(?=[\s/>])(?!\s+style=)(?=([^>]*))\2>')
+
+
+def _strip_tags(html: str) -> str:
+    """
+    Remove tags '<...>' (trechos com ao menos um caractere entre '<' e '>').
+    
+    Varredura linear com str.find: sem regex e sem backtracking.
+    """
+    parts = []
+    append = parts.append
+    find = html.find
+    pos = 0
+    while True:
+        start = find('<', pos)
+        if start < 0:
+            break
+        end = find('>', start + 1)
+        if end < 0:
+            break
+        if end == start + 1:
+            # "<>" não é tag: mantém o '<' e segue a partir do '>'
+            append(html[pos:end])
+            pos = end
+            continue
+        append(html[pos:start])
+        pos = end + 1
+    append(html[pos:])
+    return ''.join(parts)
 
 
 class HTMLCleaner:
@@ -151,10 +344,17 @@ class HTMLCleaner:
     """
     
     # Tags HTML permitidas (whitelist básica)
-    ALLOWED_TAGS = {
+    ALLOWED_TAGS = frozenset({
         'p', 'br', 'strong', 'em', 'u', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
         'ul', 'ol', 'li', 'a', 'img', 'div', 'span', 'table', 'tr', 'td', 'th'
-    }
+    })
+    
+    # Padrão pré-compilado: sem classes \s/\w nem lookaround, que o RE2
+    # trata de forma diferente ou não suporta
+    COMMENT_PATTERN = (
+        _re2.compile(r'(?s)<!--.*?-->') if USE_RE2
+        else re.compile(r'<!--.*?-->', re.DOTALL)
+    )
     
     @staticmethod
     def strip_comments(html: str) -> str:
@@ -167,7 +367,10 @@ class HTMLCleaner:
         Returns:
             HTML sem comentários
         """
-        return re.sub(r'<!--.*?-->', '', html, flags=re.DOTALL)
+        # Sem comentários (caso comum em HTML gerado): só uma busca em C
+        if '<!--' not in html:
+            return html
+        return HTMLCleaner.COMMENT_PATTERN.sub('', html)
     
     @staticmethod
     def minify(html: str) -> str:
@@ -183,13 +386,9 @@ class HTMLCleaner:
         Note:
             Não remove espaços dentro de tags <pre> ou <code>
         """
-        # Remove múltiplos espaços em branco
-        html = re.sub(r'\s+', ' ', html)
-        
-        # Remove espaços entre tags
-        html = re.sub(r'>\s+<', '><', html)
-        
-        return html.strip()
+        # split/join colapsa espaços e remove as bordas; depois só sobra
+        # ' ' simples entre tags. Tudo em C, sem callback por trecho.
+        return ' '.join(html.split()).replace('> <', '><')
     
     @staticmethod
     def extract_text(html: str) -> str:
@@ -203,12 +402,10 @@ class HTMLCleaner:
             Texto sem tags HTML
         """
         # Remove tags
-        text = re.sub(r'<[^>]+>', '', html)
+        text = _strip_tags(html)
         
-        # Normaliza espaços
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        # Normaliza espaços (split/join em C já descarta as bordas)
+        return ' '.join(text.split())
     
     @staticmethod
     def add_inline_styles(html: str, styles: Dict[str, str]) -> str:
@@ -229,15 +426,38 @@ class HTMLCleaner:
             ... )
             '<p style="color: blue; font-size: 14px;">Texto</p>'
         """
-        result = html
-        
-        for tag, style in styles.items():
-            # Adiciona style apenas se tag não tem style já definido
-            pattern = rf'<{tag}(?!\s+style=)([^>]*)>'
-            replacement = rf'<{tag} style="{style}"\1>'
-            result = re.sub(pattern, replacement, result)
-        
-        return result
+        if not styles:
+            return html
+        
+        # Uma única passada para todas as tags; adiciona style apenas se a
+        # tag ainda não tem style definido
+        heads = {tag: f'<{tag} style="{style}"' for tag, style in styles.items()}
+        return _styles_pattern(frozenset(styles)).sub(
+            lambda m: heads[m.group(1)] + m.group(2) + '>', html
+        )
+
+
+# Esquemas de cor de create_alert_box (montados uma vez, não a cada chamada)
+_ALERT_COLORS = {
+    "info": {"bg": "#EEF2FF", "border": "#6366F1", "text": "#3730A3"},
+    "success": {"bg": "#F0FDF4", "border": "#22C55E", "text": "#166534"},
+    "warning": {"bg": "#FFFBEB", "border": "#F59E0B", "text": "#92400E"},
+    "error": {"bg": "#FEF2F2", "border": "#EF4444", "text": "#991B1B"},
+}
+
+# Escape de HTML em uma passada (str.translate roda em C)
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;',
+})
+
+
+def _esc(value: str) -> str:
+    return value.translate(_HTML_ESCAPE_TABLE)
+
+
+# Células de create_table_row com o estilo já resolvido
+_CELL_TD = '<td style="padding: 12px; border: 1px solid #E5E7EB; ">%s</td>'
+_CELL_TH = '<th style="padding: 12px; border: 1px solid #E5E7EB; font-weight: bold; background: #F3F4F6;">%s</th>'
 
 
 class EmailTemplateTagger:
@@ -245,6 +465,7 @@ class EmailTemplateTagger:
     Gerador de tags dinâmicas para templates de email.
     
     Centraliza criação de componentes HTML comuns em emails.
+    Os valores recebidos são escapados (texto puro, não HTML).
     """
     
     @staticmethod
@@ -266,6 +487,8 @@ class EmailTemplateTagger:
         Returns:
             HTML do botão
         """
+        text, url = _esc(text), _esc(url)
+        bg_color, text_color = _esc(bg_color), _esc(text_color)
         return f"""
         <table border="0" cellpadding="0" cellspacing="0" role="presentation">
             <tr>
@@ -301,16 +524,10 @@ class EmailTemplateTagger:
         Returns:
             HTML do alerta
         """
-        colors = {
-            "info": {"bg": "#EEF2FF", "border": "#6366F1", "text": "#3730A3"},
-            "success": {"bg": "#F0FDF4", "border": "#22C55E", "text": "#166534"},
-            "warning": {"bg": "#FFFBEB", "border": "#F59E0B", "text": "#92400E"},
-            "error": {"bg": "#FEF2F2", "border": "#EF4444", "text": "#991B1B"},
-        }
+        color_scheme = _ALERT_COLORS.get(type, _ALERT_COLORS["info"])
         
-        color_scheme = colors.get(type, colors["info"])
-        
-        title_html = f"<strong>{title}</strong><br>" if title else ""
+        message = _esc(message)
+        title_html = f"<strong>{_esc(title)}</strong><br>" if title else ""
         
         return f"""
         <div style="
@@ -337,10 +554,10 @@ class EmailTemplateTagger:
         Returns:
             HTML do divisor
         """
-        return f'<hr style="border: none; border-top: 1px solid {color}; margin: {margin};">'
+        return f'<hr style="border: none; border-top: 1px solid {_esc(color)}; margin: {_esc(margin)};">'
     
     @staticmethod
-    def create_table_row(cells: list, is_header: bool = False) -> str:
+    def create_table_row(cells: List[Any], is_header: bool = False) -> str:
         """
         Cria linha de tabela HTML.
         
@@ -351,13 +568,8 @@ class EmailTemplateTagger:
         Returns:
             HTML da linha
         """
-        tag = "th" if is_header else "td"
-        style = "font-weight: bold; background: #F3F4F6;" if is_header else ""
-        
-        cells_html = "".join([
-            f'<{tag} style="padding: 12px; border: 1px solid #E5E7EB; {style}">{cell}</{tag}>'
-            for cell in cells
-        ])
+        cell_template = _CELL_TH if is_header else _CELL_TD
+        cells_html = "".join([cell_template % _esc(str(cell)) for cell in cells])
         
         return f"<tr>{cells_html}</tr>"
 
@@ -366,6 +578,10 @@ class EmailTemplateTagger:
 # FUNÇÕES DE CONVENIÊNCIA
 # ============================================================================
 
+# Renderizador sem template carregado, compartilhado pelas funções de conveniência
+_default_renderer = TemplateRenderer()
+
+
 def render_template(template: str, **kwargs) -> str:
     """
     Função de conveniência para renderização rápida.
@@ -381,8 +597,7 @@ def render_template(template: str, **kwargs) -> str:
         >>> render_template("Olá {{ nome }}", nome="Maria")
         "Olá Maria"
     """
-    renderer = TemplateRenderer()
-    return renderer.render(template, kwargs)
+    return _default_renderer.render(template, kwargs)
 
 
 def clean_html(html: str, minify: bool = False, strip_comments: bool = True) -> str:
@@ -6,80 +6,124 @@ tokens de design e estilização avançada.
 """
 
 import os
+import re
+import sys
+from dataclasses import dataclass, fields
+from string import Template
 import streamlit as st
-from typing import Optional, Literal
+from typing import Optional, Literal, Tuple
 
 # ============================================================================
 # DESIGN TOKENS
 # ============================================================================
 
-COLORS = {
+class _Tokens:
+    """Base dos tokens: acesso por atributo (slots), imutável e com valores internados.
+
+    `TOKENS["chave"]` continua funcionando por compatibilidade.
+    """
+
+    __slots__ = ()
+
+    def __post_init__(self):
+        for f in fields(self):
+            object.__setattr__(self, f.name, sys.intern(getattr(self, f.name)))
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+@dataclass(frozen=True, slots=True)
+class _Colors(_Tokens):
     # Primary Palette
-    "primary": "#6366F1",      # Indigo vibrante
-    "primary_hover": "#4F46E5",
-    "primary_light": "#EEF2FF",
-    "primary_dark": "#3730A3",
+    primary: str = "#6366F1"      # Indigo vibrante
+    primary_hover: str = "#4F46E5"
+    primary_light: str = "#EEF2FF"
+    primary_dark: str = "#3730A3"
     
     # Neutral Palette
-    "bg_primary": "#0F0F12",    # Fundo principal (quase preto)
-    "bg_secondary": "#18181B",  # Cards e elevações
-    "bg_tertiary": "#27272A",   # Inputs e elementos interativos
-    "bg_elevated": "#1E1E23",   # Modais e popovers
+    bg_primary: str = "#0F0F12"    # Fundo principal (quase preto)
+    bg_secondary: str = "#18181B"  # Cards e elevações
+    bg_tertiary: str = "#27272A"   # Inputs e elementos interativos
+    bg_elevated: str = "#1E1E23"   # Modais e popovers
     
     # Text
-    "text_primary": "#FAFAFA",
-    "text_secondary": "#A1A1AA",
-    "text_muted": "#71717A",
+    text_primary: str = "#FAFAFA"
+    text_secondary: str = "#A1A1AA"
+    text_muted: str = "#71717A"
     
     # Semantic
-    "success": "#22C55E",
-    "success_bg": "rgba(34, 197, 94, 0.1)",
-    "warning": "#F59E0B",
-    "warning_bg": "rgba(245, 158, 11, 0.1)",
-    "error": "#EF4444",
-    "error_bg": "rgba(239, 68, 68, 0.1)",
-    "info": "#3B82F6",
-    "info_bg": "rgba(59, 130, 246, 0.1)",
+    success: str = "#22C55E"
+    success_bg: str = "rgba(34, 197, 94, 0.1)"
+    warning: str = "#F59E0B"
+    warning_bg: str = "rgba(245, 158, 11, 0.1)"
+    error: str = "#EF4444"
+    error_bg: str = "rgba(239, 68, 68, 0.1)"
+    info: str = "#3B82F6"
+    info_bg: str = "rgba(59, 130, 246, 0.1)"
     
     # Borders
-    "border": "rgba(255, 255, 255, 0.08)",
-    "border_hover": "rgba(255, 255, 255, 0.15)",
+    border: str = "rgba(255, 255, 255, 0.08)"
+    border_hover: str = "rgba(255, 255, 255, 0.15)"
     
     # Gradients
-    "gradient_primary": "linear-gradient(135deg, #6366F1 0%, #8B5CF6 100%)",
-    "gradient_success": "linear-gradient(135deg, #22C55E 0%, #16A34A 100%)",
-    "gradient_mesh": "radial-gradient(at 40% 20%, rgba(99, 102, 241, 0.15) 0px, transparent 50%), radial-gradient(at 80% 0%, rgba(139, 92, 246, 0.1) 0px, transparent 50%), radial-gradient(at 0% 50%, rgba(34, 197, 94, 0.05) 0px, transparent 50%)",
-}
+    gradient_primary: str = "linear-gradient(135deg, #6366F1 0%, #8B5CF6 100%)"
+    gradient_success: str = "linear-gradient(135deg, #22C55E 0%, #16A34A 100%)"
+    gradient_mesh: str = "radial-gradient(at 40% 20%, rgba(99, 102, 241, 0.15) 0px, transparent 50%), radial-gradient(at 80% 0%, rgba(139, 92, 246, 0.1) 0px, transparent 50%), radial-gradient(at 0% 50%, rgba(34, 197, 94, 0.05) 0px, transparent 50%)"
 
-SPACING = {
-    "xs": "0.25rem",
-    "sm": "0.5rem",
-    "md": "1rem",
-    "lg": "1.5rem",
-    "xl": "2rem",
-    "2xl": "3rem",
-}
 
-TYPOGRAPHY = {
-    "font_family": "'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif",
-    "font_mono": "'JetBrains Mono', 'Fira Code', monospace",
-}
+@dataclass(frozen=True, slots=True)
+class _Spacing(_Tokens):
+    xs: str = "0.25rem"
+    sm: str = "0.5rem"
+    md: str = "1rem"
+    lg: str = "1.5rem"
+    xl: str = "2rem"
+    xxl: str = "3rem"
 
-SHADOWS = {
-    "sm": "0 1px 2px rgba(0, 0, 0, 0.3)",
-    "md": "0 4px 6px -1px rgba(0, 0, 0, 0.4), 0 2px 4px -2px rgba(0, 0, 0, 0.3)",
-    "lg": "0 10px 15px -3px rgba(0, 0, 0, 0.5), 0 4px 6px -4px rgba(0, 0, 0, 0.4)",
-    "glow": f"0 0 20px rgba(99, 102, 241, 0.3)",
-}
+    def __getitem__(self, key: str) -> str:
+        # "2xl" não é identificador válido; mantido como alias de `xxl`
+        return _Tokens.__getitem__(self, "xxl" if key == "2xl" else key)
+
+
+@dataclass(frozen=True, slots=True)
+class _Typography(_Tokens):
+    font_family: str = "'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif"
+    font_mono: str = "'JetBrains Mono', 'Fira Code', monospace"
+
+
+@dataclass(frozen=True, slots=True)
+class _Shadows(_Tokens):
+    sm: str = "0 1px 2px rgba(0, 0, 0, 0.3)"
+    md: str = "0 4px 6px -1px rgba(0, 0, 0, 0.4), 0 2px 4px -2px rgba(0, 0, 0, 0.3)"
+    lg: str = "0 10px 15px -3px rgba(0, 0, 0, 0.5), 0 4px 6px -4px rgba(0, 0, 0, 0.4)"
+    glow: str = "0 0 20px rgba(99, 102, 241, 0.3)"
+
+
+COLORS = _Colors()
+SPACING = _Spacing()
+TYPOGRAPHY = _Typography()
+SHADOWS = _Shadows()
 
 # ============================================================================
 # GLOBAL STYLES
 # ============================================================================
 
-def inject_global_styles():
-    """Injeta o sistema de design completo na aplicação."""
-    
-    st.markdown(f"""
+_CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def _minify_css(css: str) -> str:
+    """Remove comentários e colapsa espaços (o CSS não tem strings com espaços duplos)."""
+    return ' '.join(_CSS_COMMENT_PATTERN.sub('', css).split())
+
+
+# Folha de estilos global gerada uma única vez na importação: os tokens são
+# imutáveis, então todo rerun/sessão reutiliza a mesma string (internada).
+# Vai minificada: é reenviada ao navegador a cada rerun
+_GLOBAL_CSS = sys.intern(_minify_css(f"""
     <style>
     /* ========================================
        GOOGLE FONTS
@@ -97,11 +141,11 @@ def inject_global_styles():
        ROOT & BODY
     ======================================== */
     .stApp {{
-        background: {COLORS['bg_primary']};
-        background-image: {COLORS['gradient_mesh']};
+        background: {COLORS.bg_primary};
+        background-image: {COLORS.gradient_mesh};
         background-attachment: fixed;
         /* fonte padrão da aplicação (filhos herdam) */
-        font-family: {TYPOGRAPHY['font_family']};
+        font-family: {TYPOGRAPHY.font_family};
     }}
     
     /* (REMOVIDO) .stApp * para não sobrescrever fontes de ícones */
@@ -110,8 +154,8 @@ def inject_global_styles():
        SIDEBAR
     ======================================== */
     section[data-testid="stSidebar"] {{
-        background: {COLORS['bg_secondary']};
-        border-right: 1px solid {COLORS['border']};
+        background: {COLORS.bg_secondary};
+        border-right: 1px solid {COLORS.border};
     }}
     
     section[data-testid="stSidebar"] > div:first-child {{
@@ -134,7 +178,7 @@ def inject_global_styles():
     h1, .stMarkdown h1 {{
         font-size: 2rem !important;
         font-weight: 700 !important;
-        color: {COLORS['text_primary']} !important;
+        color: {COLORS.text_primary} !important;
         letter-spacing: -0.025em;
         margin-bottom: 0.5rem !important;
     }}
@@ -142,18 +186,18 @@ def inject_global_styles():
     h2, .stMarkdown h2 {{
         font-size: 1.5rem !important;
         font-weight: 600 !important;
-        color: {COLORS['text_primary']} !important;
+        color: {COLORS.text_primary} !important;
         letter-spacing: -0.02em;
     }}
     
     h3, .stMarkdown h3 {{
         font-size: 1.125rem !important;
         font-weight: 600 !important;
-        color: {COLORS['text_primary']} !important;
+        color: {COLORS.text_primary} !important;
     }}
     
     p, .stMarkdown p {{
-        color: {COLORS['text_secondary']};
+        color: {COLORS.text_secondary};
         line-height: 1.6;
     }}
     
@@ -161,7 +205,7 @@ def inject_global_styles():
        BUTTONS
     ======================================== */
     .stButton > button {{
-        background: {COLORS['gradient_primary']} !important;
+        background: {COLORS.gradient_primary} !important;
         color: white !important;
         border: none !important;
         border-radius: 10px !important;
@@ -170,12 +214,12 @@ def inject_global_styles():
         font-size: 0.875rem !important;
         letter-spacing: 0.01em;
         transition: all 0.2s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        box-shadow: {SHADOWS['md']}, {SHADOWS['glow']} !important;
+        box-shadow: {SHADOWS.md}, {SHADOWS.glow} !important;
     }}
     
     .stButton > button:hover {{
         transform: translateY(-1px) !important;
-        box-shadow: {SHADOWS['lg']}, 0 0 30px rgba(99, 102, 241, 0.4) !important;
+        box-shadow: {SHADOWS.lg}, 0 0 30px rgba(99, 102, 241, 0.4) !important;
     }}
     
     .stButton > button:active {{
@@ -185,14 +229,14 @@ def inject_global_styles():
     /* Secondary button style */
     .stButton > button[kind="secondary"] {{
         background: transparent !important;
-        border: 1px solid {COLORS['border']} !important;
-        color: {COLORS['text_primary']} !important;
+        border: 1px solid {COLORS.border} !important;
+        color: {COLORS.text_primary} !important;
         box-shadow: none !important;
     }}
     
     .stButton > button[kind="secondary"]:hover {{
-        background: {COLORS['bg_tertiary']} !important;
-        border-color: {COLORS['border_hover']} !important;
+        background: {COLORS.bg_tertiary} !important;
+        border-color: {COLORS.border_hover} !important;
     }}
     
     /* ========================================
@@ -200,10 +244,10 @@ def inject_global_styles():
     ======================================== */
     .stTextInput > div > div > input,
     .stTextArea > div > div > textarea {{
-        background: {COLORS['bg_tertiary']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_tertiary} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 10px !important;
-        color: {COLORS['text_primary']} !important;
+        color: {COLORS.text_primary} !important;
         padding: 0.75rem 1rem !important;
         font-size: 0.9rem !important;
         transition: all 0.2s ease !important;
@@ -211,20 +255,20 @@ def inject_global_styles():
     
     .stTextInput > div > div > input:focus,
     .stTextArea > div > div > textarea:focus {{
-        border-color: {COLORS['primary']} !important;
+        border-color: {COLORS.primary} !important;
         box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.15) !important;
         outline: none !important;
     }}
     
     .stTextInput > div > div > input::placeholder,
     .stTextArea > div > div > textarea::placeholder {{
-        color: {COLORS['text_muted']} !important;
+        color: {COLORS.text_muted} !important;
     }}
     
     /* Selectbox */
     .stSelectbox > div > div {{
-        background: {COLORS['bg_tertiary']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_tertiary} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 10px !important;
     }}
     
@@ -233,20 +277,20 @@ def inject_global_styles():
     }}
     
     .stSelectbox [data-baseweb="select"] > div {{
-        background: {COLORS['bg_tertiary']} !important;
+        background: {COLORS.bg_tertiary} !important;
         border: none !important;
         border-radius: 10px !important;
     }}
     
     /* Multiselect */
     .stMultiSelect > div > div {{
-        background: {COLORS['bg_tertiary']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_tertiary} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 10px !important;
     }}
     
     .stMultiSelect [data-baseweb="tag"] {{
-        background: {COLORS['primary']} !important;
+        background: {COLORS.primary} !important;
         border-radius: 6px !important;
     }}
     
@@ -254,33 +298,33 @@ def inject_global_styles():
        TOGGLE / CHECKBOX
     ======================================== */
     .stCheckbox > label > div[data-testid="stCheckbox"] {{
-        background: {COLORS['bg_tertiary']} !important;
+        background: {COLORS.bg_tertiary} !important;
         border-radius: 4px !important;
     }}
     
     .stCheckbox > label > div[data-testid="stCheckbox"][aria-checked="true"] {{
-        background: {COLORS['primary']} !important;
+        background: {COLORS.primary} !important;
     }}
     
     /* Toggle */
     div[data-baseweb="toggle"] > div {{
-        background: {COLORS['bg_tertiary']} !important;
+        background: {COLORS.bg_tertiary} !important;
     }}
     
     div[data-baseweb="toggle"][aria-checked="true"] > div {{
-        background: {COLORS['primary']} !important;
+        background: {COLORS.primary} !important;
     }}
     
     /* ========================================
        PROGRESS BAR
     ======================================== */
     .stProgress > div > div > div {{
-        background: {COLORS['gradient_primary']} !important;
+        background: {COLORS.gradient_primary} !important;
         border-radius: 999px !important;
     }}
     
     .stProgress > div > div {{
-        background: {COLORS['primary']} !important;
+        background: {COLORS.primary} !important;
         border-radius: 999px !important;
     }}
     
@@ -288,20 +332,20 @@ def inject_global_styles():
        EXPANDER
     ======================================== */
     .streamlit-expanderHeader {{
-        background: {COLORS['bg_secondary']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_secondary} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 12px !important;
-        color: {COLORS['text_primary']} !important;
+        color: {COLORS.text_primary} !important;
         font-weight: 500 !important;
     }}
     
     .streamlit-expanderHeader:hover {{
-        border-color: {COLORS['border_hover']} !important;
+        border-color: {COLORS.border_hover} !important;
     }}
     
     .streamlit-expanderContent {{
-        background: {COLORS['bg_secondary']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_secondary} !important;
+        border: 1px solid {COLORS.border} !important;
         border-top: none !important;
         border-radius: 0 0 12px 12px !important;
     }}
@@ -310,13 +354,13 @@ def inject_global_styles():
        DATAFRAME
     ======================================== */
     .stDataFrame {{
-        border: 1px solid {COLORS['border']} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 12px !important;
         overflow: hidden !important;
     }}
     
     .stDataFrame [data-testid="stDataFrameResizable"] {{
-        background: {COLORS['bg_secondary']} !important;
+        background: {COLORS.bg_secondary} !important;
     }}
     
     /* ========================================
@@ -328,14 +372,14 @@ def inject_global_styles():
     }}
     
     div[data-testid="stNotification"] {{
-        background: {COLORS['bg_elevated']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_elevated} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 12px !important;
     }}
     
     /* Success */
     .element-container div[data-testid="stAlert"][data-baseweb="notification"] {{
-        border-left: 4px solid {COLORS['success']} !important;
+        border-left: 4px solid {COLORS.success} !important;
     }}
     
     /* ========================================
@@ -343,7 +387,7 @@ def inject_global_styles():
     ======================================== */
     hr {{
         border: none !important;
-        border-top: 1px solid {COLORS['border']} !important;
+        border-top: 1px solid {COLORS.border} !important;
         margin: 1.5rem 0 !important;
     }}
     
@@ -352,12 +396,12 @@ def inject_global_styles():
     ======================================== */
     .stCodeBlock {{
         border-radius: 12px !important;
-        border: 1px solid {COLORS['border']} !important;
+        border: 1px solid {COLORS.border} !important;
     }}
     
     code {{
-        font-family: {TYPOGRAPHY['font_mono']} !important;
-        background: {COLORS['bg_tertiary']} !important;
+        font-family: {TYPOGRAPHY.font_mono} !important;
+        background: {COLORS.bg_tertiary} !important;
         padding: 0.2rem 0.4rem !important;
         border-radius: 6px !important;
         font-size: 0.85rem !important;
@@ -373,16 +417,16 @@ def inject_global_styles():
     
     .stTabs [data-baseweb="tab"] {{
         background: transparent !important;
-        border: 1px solid {COLORS['border']} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 10px !important;
-        color: {COLORS['text_secondary']} !important;
+        color: {COLORS.text_secondary} !important;
         padding: 0.5rem 1rem !important;
         font-weight: 500 !important;
     }}
     
     .stTabs [data-baseweb="tab"][aria-selected="true"] {{
-        background: {COLORS['primary']} !important;
-        border-color: {COLORS['primary']} !important;
+        background: {COLORS.primary} !important;
+        border-color: {COLORS.primary} !important;
         color: white !important;
     }}
     
@@ -394,14 +438,14 @@ def inject_global_styles():
        METRICS
     ======================================== */
     [data-testid="stMetric"] {{
-        background: {COLORS['bg_secondary']} !important;
-        border: 1px solid {COLORS['border']} !important;
+        background: {COLORS.bg_secondary} !important;
+        border: 1px solid {COLORS.border} !important;
         border-radius: 16px !important;
         padding: 1.25rem !important;
     }}
     
     [data-testid="stMetricLabel"] {{
-        color: {COLORS['text_muted']} !important;
+        color: {COLORS.text_muted} !important;
         font-size: 0.75rem !important;
         font-weight: 500 !important;
         text-transform: uppercase !important;
@@ -409,7 +453,7 @@ def inject_global_styles():
     }}
     
     [data-testid="stMetricValue"] {{
-        color: {COLORS['text_primary']} !important;
+        color: {COLORS.text_primary} !important;
         font-size: 1.75rem !important;
         font-weight: 700 !important;
     }}
@@ -423,16 +467,16 @@ def inject_global_styles():
     }}
     
     ::-webkit-scrollbar-track {{
-        background: {COLORS['bg_primary']};
+        background: {COLORS.bg_primary};
     }}
     
     ::-webkit-scrollbar-thumb {{
-        background: {COLORS['bg_tertiary']};
+        background: {COLORS.bg_tertiary};
         border-radius: 4px;
     }}
     
     ::-webkit-scrollbar-thumb:hover {{
-        background: {COLORS['text_muted']};
+        background: {COLORS.text_muted};
     }}
     
     /* ========================================
@@ -465,16 +509,16 @@ def inject_global_styles():
        CUSTOM COMPONENTS
     ======================================== */
     .card {{
-        background: {COLORS['bg_secondary']};
-        border: 1px solid {COLORS['border']};
+        background: {COLORS.bg_secondary};
+        border: 1px solid {COLORS.border};
         border-radius: 16px;
         padding: 1.5rem;
         transition: all 0.2s ease;
     }}
     
     .card:hover {{
-        border-color: {COLORS['border_hover']};
-        box-shadow: {SHADOWS['md']};
+        border-color: {COLORS.border_hover};
+        box-shadow: {SHADOWS.md};
     }}
     
     .card-header {{
@@ -506,28 +550,28 @@ def inject_global_styles():
     }}
     
     .badge-success {{
-        background: {COLORS['success_bg']};
-        color: {COLORS['success']};
+        background: {COLORS.success_bg};
+        color: {COLORS.success};
     }}
     
     .badge-warning {{
-        background: {COLORS['warning_bg']};
-        color: {COLORS['warning']};
+        background: {COLORS.warning_bg};
+        color: {COLORS.warning};
     }}
     
     .badge-error {{
-        background: {COLORS['error_bg']};
-        color: {COLORS['error']};
+        background: {COLORS.error_bg};
+        color: {COLORS.error};
     }}
     
     .badge-info {{
-        background: {COLORS['info_bg']};
-        color: {COLORS['info']};
+        background: {COLORS.info_bg};
+        color: {COLORS.info};
     }}
     
     .stat-card {{
-        background: linear-gradient(135deg, {COLORS['bg_secondary']} 0%, {COLORS['bg_tertiary']} 100%);
-        border: 1px solid {COLORS['border']};
+        background: linear-gradient(135deg, {COLORS.bg_secondary} 0%, {COLORS.bg_tertiary} 100%);
+        border: 1px solid {COLORS.border};
         border-radius: 16px;
         padding: 1.25rem;
         position: relative;
@@ -550,7 +594,7 @@ def inject_global_styles():
         gap: 0.75rem;
         padding: 0.75rem 1rem;
         border-radius: 10px;
-        color: {COLORS['text_secondary']};
+        color: {COLORS.text_secondary};
         text-decoration: none;
         transition: all 0.15s ease;
         cursor: pointer;
@@ -558,12 +602,12 @@ def inject_global_styles():
     }}
     
     .nav-item:hover {{
-        background: {COLORS['bg_tertiary']};
-        color: {COLORS['text_primary']};
+        background: {COLORS.bg_tertiary};
+        color: {COLORS.text_primary};
     }}
     
     .nav-item.active {{
-        background: {COLORS['primary']};
+        background: {COLORS.primary};
         color: white;
     }}
     
@@ -586,7 +630,7 @@ def inject_global_styles():
     .section-header .line {{
         flex: 1;
         height: 1px;
-        background: {COLORS['border']};
+        background: {COLORS.border};
     }}
     
     /* Status indicator */
@@ -598,55 +642,56 @@ def inject_global_styles():
     }}
     
     .status-dot.online {{
-        background: {COLORS['success']};
-        box-shadow: 0 0 8px {COLORS['success']};
+        background: {COLORS.success};
+        box-shadow: 0 0 8px {COLORS.success};
     }}
     
     .status-dot.offline {{
-        background: {COLORS['error']};
+        background: {COLORS.error};
     }}
     
     .status-dot.pending {{
-        background: {COLORS['warning']};
+        background: {COLORS.warning};
         animation: pulse 1.5s infinite;
     }}
     </style>
-    """, unsafe_allow_html=True)
+    """))
+
+
+def inject_global_styles():
+    """
+    Injeta o sistema de design completo na aplicação.
+    
+    Deve rodar em todo rerun: o Streamlit descarta os elementos que o script
+    não emite de novo, então um guard "uma vez por sessão" em session_state
+    removeria o <style> já no rerun seguinte. Como _GLOBAL_CSS não muda, o
+    frontend reaproveita o elemento idêntico na mesma posição.
+    """
+    st.markdown(_GLOBAL_CSS, unsafe_allow_html=True)
 
 
 # ============================================================================
 # COMPONENT HELPERS
 # ============================================================================
 
-def render_sidebar_branding(
-    title: str = "Portal Performance",
-    subtitle: str = "Gestão de Relatórios HTML",
-    version: str = "Allos"
-):
-    """Renderiza sidebar profissional com branding e navegação."""
-    
-    logo_path = os.path.abspath(os.path.join(
-        os.path.dirname(__file__), "..", "..", "assets", "logo-atlas.png"
-    ))
-    
-    with st.sidebar:
-        # Logo Container
-        st.markdown("""
+# Logo resolvido uma vez na importação (sem stat/exceção a cada render)
+_LOGO_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "assets", "logo-atlas.png"
+))
+_LOGO_EXISTS = os.path.isfile(_LOGO_PATH)
+
+# Fragmentos da sidebar montados uma vez (só dependem da paleta)
+_SIDEBAR_LOGO_OPEN = """
         <div style="
             padding: 1rem;
             margin-bottom: 0.5rem;
         ">
-        """, unsafe_allow_html=True)
-        
-        try:
-            st.image(logo_path, use_container_width=True)
-        except Exception:
-            # Fallback: logo placeholder
-            st.markdown(f"""
+        """
+_FALLBACK_LOGO_HTML = f"""
             <div style="
                 width: 100%;
                 height: 60px;
-                background: {COLORS['gradient_primary']};
+                background: {COLORS.gradient_primary};
                 border-radius: 12px;
                 display: flex;
                 align-items: center;
@@ -657,12 +702,9 @@ def render_sidebar_branding(
             ">
                 ATLAS
             </div>
-            """, unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        # Title & Version
-        st.markdown(f"""
+            """
+# Título/versão + container da navegação num único elemento (um st.markdown)
+_SIDEBAR_TPL = Template(f"""
         <div style="padding: 0 1rem; margin-bottom: 1.5rem;">
             <div style="
                 display: flex;
@@ -673,92 +715,96 @@ def render_sidebar_branding(
                     margin: 0;
                     font-size: 1.25rem;
                     font-weight: 700;
-                    color: {COLORS['text_primary']};
-                ">{title}</h2>
+                    color: {COLORS.text_primary};
+                ">${{title}}</h2>
                 <span style="
-                    background: {COLORS['bg_tertiary']};
-                    color: {COLORS['text_muted']};
+                    background: {COLORS.bg_tertiary};
+                    color: {COLORS.text_muted};
                     padding: 0.2rem 0.5rem;
                     border-radius: 6px;
                     font-size: 0.7rem;
                     font-weight: 600;
-                ">{version}</span>
+                ">${{version}}</span>
             </div>
             <p style="
                 margin: 0.25rem 0 0 0;
                 font-size: 0.8rem;
-                color: {COLORS['text_muted']};
-            ">{subtitle}</p>
+                color: {COLORS.text_muted};
+            ">${{subtitle}}</p>
         </div>
-        """, unsafe_allow_html=True)
-        
-        # Navigation
-        st.markdown(f"""
         <div style="
             padding: 0 0.5rem;
             display: flex;
             flex-direction: column;
             gap: 0.25rem;
         ">
-        """, unsafe_allow_html=True)
-        
-        # Get current page for active state
-        current_page = st.session_state.get("current_page", "execucao")
-        
-        nav_items = [
-            ("execucao", "", "Execução", "pages/1_Execução.py"),
-            ("preview", "", "Preview", "pages/2_Preview.py"),
-            ("config", "", "Configurações", "pages/3_Configurações.py"),
-            ("logs", "", "Logs", "pages/4_Logs.py"),
-            ("help", "", "Ajuda", "pages/5_Ajuda.py"),
-        ]
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        # Render navigation with Streamlit's page_link
-        for key, icon, label, page in nav_items:
-            st.page_link(page, label=f"{icon}  {label}")
-        
-                # Footer (ancorado no fim da coluna da sidebar, sem sobrepor o menu)
-        st.markdown(f"""
+        </div>
+        """)
+_SIDEBAR_FOOTER_HTML = f"""
         <div class="sidebar-footer" style="
             margin-top: auto;
             padding-top: 1rem;
-            border-top: 1px solid {COLORS['border']};
+            border-top: 1px solid {COLORS.border};
         ">
             <div style="
                 display: flex;
                 align-items: center;
                 gap: 0.5rem;
-                color: {COLORS['text_muted']};
+                color: {COLORS.text_muted};
                 font-size: 0.75rem;
             ">
                 <span class="status-dot online"></span>
                 Sistema operacional
             </div>
         </div>
-        """, unsafe_allow_html=True)
-
+        """
 
+# Itens da navegação: (chave, ícone, rótulo, página)
+_NAV_ITEMS: Tuple[Tuple[str, str, str, str], ...] = (
+    ("execucao", "", "Execução", "pages/1_Execução.py"),
+    ("preview", "", "Preview", "pages/2_Preview.py"),
+    ("config", "", "Configurações", "pages/3_Configurações.py"),
+    ("logs", "", "Logs", "pages/4_Logs.py"),
+    ("help", "", "Ajuda", "pages/5_Ajuda.py"),
+)
 
 
-
-def render_page_header(
-    title: str,
-    subtitle: Optional[str] = None,
-    icon: Optional[str] = None,
-    badge: Optional[tuple] = None  # (text, type: success/warning/error/info)
+def render_sidebar_branding(
+    title: str = "Portal Performance",
+    subtitle: str = "Gestão de Relatórios HTML",
+    version: str = "Allos"
 ):
-    """Renderiza header de página com título, subtítulo e badge opcional."""
-    
-    badge_html = ""
-    if badge:
-        badge_text, badge_type = badge
-        badge_html = f'<span class="badge badge-{badge_type}">{badge_text}</span>'
-    
-    icon_html = f'<span style="font-size: 2rem; margin-right: 0.5rem;">{icon}</span>' if icon else ""
+    """Renderiza sidebar profissional com branding e navegação."""
     
-    st.markdown(f"""
+    with st.sidebar:
+        # Logo Container
+        st.markdown(_SIDEBAR_LOGO_OPEN, unsafe_allow_html=True)
+        
+        if _LOGO_EXISTS:
+            st.image(_LOGO_PATH, use_container_width=True)
+        else:
+            # Fallback: logo placeholder
+            st.markdown(_FALLBACK_LOGO_HTML, unsafe_allow_html=True)
+        
+        # Title & Version + Navigation
+        st.markdown(_SIDEBAR_TPL.substitute(
+            title=title, version=version, subtitle=subtitle
+        ), unsafe_allow_html=True)
+        
+        # Render navigation with Streamlit's page_link
+        for key, icon, label, page in _NAV_ITEMS:
+            st.page_link(page, label=f"{icon}  {label}")
+        
+                # Footer (ancorado no fim da coluna da sidebar, sem sobrepor o menu)
+        st.markdown(_SIDEBAR_FOOTER_HTML, unsafe_allow_html=True)
+
+
+
+
+
+# Templates dos componentes: a paleta é interpolada uma vez na importação e
+# cada chamada só substitui os parâmetros ($nome)
+_PAGE_HEADER_TPL = Template(f"""
     <div style="
         display: flex;
         align-items: center;
@@ -768,40 +814,52 @@ def render_page_header(
     ">
         <div>
             <div style="display: flex; align-items: center; gap: 0.75rem;">
-                {icon_html}
-                <h1 style="margin: 0; font-size: 2rem;">{title}</h1>
-                {badge_html}
+                ${{icon_html}}
+                <h1 style="margin: 0; font-size: 2rem;">${{title}}</h1>
+                ${{badge_html}}
             </div>
-            {"<p style='margin: 0.25rem 0 0 0; color: " + COLORS['text_secondary'] + ";'>" + subtitle + "</p>" if subtitle else ""}
+            ${{subtitle_html}}
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+_PAGE_SUBTITLE_OPEN = f"<p style='margin: 0.25rem 0 0 0; color: {COLORS.text_secondary};'>"
 
 
-def render_stat_card(
-    label: str,
-    value: str,
-    icon: str,
-    change: Optional[str] = None,
-    change_type: Literal["positive", "negative", "neutral"] = "neutral"
+def render_page_header(
+    title: str,
+    subtitle: Optional[str] = None,
+    icon: Optional[str] = None,
+    badge: Optional[tuple] = None  # (text, type: success/warning/error/info)
 ):
-    """Renderiza card de estatística."""
+    """Renderiza header de página com título, subtítulo e badge opcional."""
     
-    change_color = {
-        "positive": COLORS['success'],
-        "negative": COLORS['error'],
-        "neutral": COLORS['text_muted']
-    }[change_type]
+    badge_html = ""
+    if badge:
+        badge_text, badge_type = badge
+        badge_html = f'<span class="badge badge-{badge_type}">{badge_text}</span>'
     
-    change_html = f"""
+    icon_html = f'<span style="font-size: 2rem; margin-right: 0.5rem;">{icon}</span>' if icon else ""
+    
+    subtitle_html = _PAGE_SUBTITLE_OPEN + subtitle + "</p>" if subtitle else ""
+    
+    st.markdown(_PAGE_HEADER_TPL.substitute(
+        icon_html=icon_html, title=title, badge_html=badge_html, subtitle_html=subtitle_html
+    ), unsafe_allow_html=True)
+
+
+_CHANGE_COLOR = {
+    "positive": COLORS.success,
+    "negative": COLORS.error,
+    "neutral": COLORS.text_muted,
+}
+_STAT_CHANGE_TPL = Template(f"""
     <div style="
         font-size: 0.75rem;
-        color: {change_color};
+        color: ${{change_color}};
         margin-top: 0.25rem;
-    ">{change}</div>
-    """ if change else ""
-    
-    st.markdown(f"""
+    ">${{change}}</div>
+    """)
+_STAT_CARD_TPL = Template(f"""
     <div class="stat-card">
         <div style="
             display: flex;
@@ -811,91 +869,114 @@ def render_stat_card(
             <div>
                 <div style="
                     font-size: 0.75rem;
-                    color: {COLORS['text_muted']};
+                    color: {COLORS.text_muted};
                     text-transform: uppercase;
                     letter-spacing: 0.05em;
                     font-weight: 500;
                     margin-bottom: 0.25rem;
-                ">{label}</div>
+                ">${{label}}</div>
                 <div style="
                     font-size: 1.75rem;
                     font-weight: 700;
-                    color: {COLORS['text_primary']};
-                ">{value}</div>
-                {change_html}
+                    color: {COLORS.text_primary};
+                ">${{value}}</div>
+                ${{change_html}}
             </div>
             <div style="
                 width: 44px;
                 height: 44px;
-                background: {COLORS['primary']}20;
+                background: {COLORS.primary}20;
                 border-radius: 12px;
                 display: flex;
                 align-items: center;
                 justify-content: center;
                 font-size: 1.25rem;
-            ">{icon}</div>
+            ">${{icon}}</div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
 
-def render_card(title: str, content: str, icon: Optional[str] = None):
-    """Renderiza um card genérico."""
+def render_stat_card(
+    label: str,
+    value: str,
+    icon: str,
+    change: Optional[str] = None,
+    change_type: Literal["positive", "negative", "neutral"] = "neutral"
+):
+    """Renderiza card de estatística."""
+    
+    change_color = _CHANGE_COLOR[change_type]
+    
+    change_html = _STAT_CHANGE_TPL.substitute(
+        change_color=change_color, change=change
+    ) if change else ""
     
-    icon_html = f"""
+    st.markdown(_STAT_CARD_TPL.substitute(
+        label=label, value=value, change_html=change_html, icon=icon
+    ), unsafe_allow_html=True)
+
+
+_CARD_ICON_TPL = Template(f"""
     <div style="
         width: 40px;
         height: 40px;
-        background: {COLORS['primary']}20;
+        background: {COLORS.primary}20;
         border-radius: 10px;
         display: flex;
         align-items: center;
         justify-content: center;
         font-size: 1.25rem;
-    ">{icon}</div>
-    """ if icon else ""
-    
-    st.markdown(f"""
+    ">${{icon}}</div>
+    """)
+_CARD_TPL = Template(f"""
     <div class="card">
         <div class="card-header">
-            {icon_html}
-            <h3 style="margin: 0; font-size: 1rem; color: {COLORS['text_primary']};">{title}</h3>
+            ${{icon_html}}
+            <h3 style="margin: 0; font-size: 1rem; color: {COLORS.text_primary};">${{title}}</h3>
         </div>
-        <div style="color: {COLORS['text_secondary']}; font-size: 0.9rem; line-height: 1.6;">
-            {content}
+        <div style="color: {COLORS.text_secondary}; font-size: 0.9rem; line-height: 1.6;">
+            ${{content}}
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
 
-def render_section_header(title: str, show_line: bool = True):
-    """Renderiza cabeçalho de seção com linha decorativa."""
+def render_card(title: str, content: str, icon: Optional[str] = None):
+    """Renderiza um card genérico."""
     
-    line_html = f'<div class="line"></div>' if show_line else ""
+    icon_html = _CARD_ICON_TPL.substitute(icon=icon) if icon else ""
     
-    st.markdown(f"""
+    st.markdown(_CARD_TPL.substitute(
+        icon_html=icon_html, title=title, content=content
+    ), unsafe_allow_html=True)
+
+
+_SECTION_HEADER_TPL = Template(f"""
     <div class="section-header">
         <h3 style="
             margin: 0;
             font-size: 1rem;
             font-weight: 600;
-            color: {COLORS['text_primary']};
+            color: {COLORS.text_primary};
             white-space: nowrap;
-        ">{title}</h3>
-        {line_html}
+        ">${{title}}</h3>
+        ${{line_html}}
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
 
-def render_empty_state(
-    title: str,
-    description: str,
-    icon: str = "📭",
-    action_label: Optional[str] = None
-):
-    """Renderiza estado vazio com call-to-action."""
+def render_section_header(title: str, show_line: bool = True):
+    """Renderiza cabeçalho de seção com linha decorativa."""
+    
+    line_html = '<div class="line"></div>' if show_line else ""
     
-    st.markdown(f"""
+    st.markdown(_SECTION_HEADER_TPL.substitute(
+        title=title, line_html=line_html
+    ), unsafe_allow_html=True)
+
+
+_EMPTY_STATE_TPL = Template(f"""
     <div style="
         display: flex;
         flex-direction: column;
@@ -903,84 +984,105 @@ def render_empty_state(
         justify-content: center;
         padding: 3rem;
         text-align: center;
-        background: {COLORS['bg_secondary']};
-        border: 1px dashed {COLORS['border']};
+        background: {COLORS.bg_secondary};
+        border: 1px dashed {COLORS.border};
         border-radius: 16px;
         animation: fadeIn 0.3s ease-out;
     ">
-        <div style="font-size: 3rem; margin-bottom: 1rem; opacity: 0.5;">{icon}</div>
-        <h3 style="margin: 0 0 0.5rem 0; color: {COLORS['text_primary']};">{title}</h3>
-        <p style="margin: 0; color: {COLORS['text_muted']}; max-width: 300px;">{description}</p>
+        <div style="font-size: 3rem; margin-bottom: 1rem; opacity: 0.5;">${{icon}}</div>
+        <h3 style="margin: 0 0 0.5rem 0; color: {COLORS.text_primary};">${{title}}</h3>
+        <p style="margin: 0; color: {COLORS.text_muted}; max-width: 300px;">${{description}}</p>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+
+
+def render_empty_state(
+    title: str,
+    description: str,
+    icon: str = "📭",
+    action_label: Optional[str] = None
+):
+    """Renderiza estado vazio com call-to-action."""
+    
+    st.markdown(_EMPTY_STATE_TPL.substitute(
+        icon=icon, title=title, description=description
+    ), unsafe_allow_html=True)
     
     if action_label:
         st.button(action_label, use_container_width=True)
 
 
-def render_loading_skeleton(height: int = 100):
-    """Renderiza skeleton loading animado."""
-    
-    st.markdown(f"""
+_SKELETON_TPL = Template(f"""
     <div style="
-        height: {height}px;
+        height: ${{height}}px;
         background: linear-gradient(
             90deg,
-            {COLORS['bg_tertiary']} 25%,
-            {COLORS['bg_secondary']} 50%,
-            {COLORS['bg_tertiary']} 75%
+            {COLORS.bg_tertiary} 25%,
+            {COLORS.bg_secondary} 50%,
+            {COLORS.bg_tertiary} 75%
         );
         background-size: 200% 100%;
         animation: shimmer 1.5s infinite;
         border-radius: 12px;
     "></div>
-    """, unsafe_allow_html=True)
+    """)
 
 
-def render_toast(message: str, type: Literal["success", "error", "warning", "info"] = "info"):
-    """Renderiza notificação toast."""
-    
-    colors = {
-        "success": (COLORS['success'], COLORS['success_bg'], "✓"),
-        "error": (COLORS['error'], COLORS['error_bg'], "✕"),
-        "warning": (COLORS['warning'], COLORS['warning_bg'], "⚠"),
-        "info": (COLORS['info'], COLORS['info_bg'], "ℹ"),
-    }
-    
-    color, bg, icon = colors[type]
+def render_loading_skeleton(height: int = 100):
+    """Renderiza skeleton loading animado."""
     
-    st.markdown(f"""
+    st.markdown(_SKELETON_TPL.substitute(height=height), unsafe_allow_html=True)
+
+
+# Cor, fundo e ícone de cada tipo de toast: (cor, fundo, ícone)
+_TOAST_STYLES = {
+    "success": (COLORS.success, COLORS.success_bg, "✓"),
+    "error": (COLORS.error, COLORS.error_bg, "✕"),
+    "warning": (COLORS.warning, COLORS.warning_bg, "⚠"),
+    "info": (COLORS.info, COLORS.info_bg, "ℹ"),
+}
+_TOAST_TPL = Template(f"""
     <div style="
         position: fixed;
         bottom: 2rem;
         right: 2rem;
-        background: {COLORS['bg_elevated']};
-        border: 1px solid {color}40;
-        border-left: 4px solid {color};
+        background: {COLORS.bg_elevated};
+        border: 1px solid ${{color}}40;
+        border-left: 4px solid ${{color}};
         border-radius: 12px;
         padding: 1rem 1.5rem;
         display: flex;
         align-items: center;
         gap: 0.75rem;
-        box-shadow: {SHADOWS['lg']};
+        box-shadow: {SHADOWS.lg};
         z-index: 9999;
         animation: fadeIn 0.3s ease-out;
     ">
         <span style="
             width: 24px;
             height: 24px;
-            background: {bg};
-            color: {color};
+            background: ${{bg}};
+            color: ${{color}};
             border-radius: 50%;
             display: flex;
             align-items: center;
             justify-content: center;
             font-size: 0.75rem;
             font-weight: bold;
-        ">{icon}</span>
-        <span style="color: {COLORS['text_primary']};">{message}</span>
+        ">${{icon}}</span>
+        <span style="color: {COLORS.text_primary};">${{message}}</span>
     </div>
-    """, unsafe_allow_html=True)
+    """)
+
+
+def render_toast(message: str, type: Literal["success", "error", "warning", "info"] = "info"):
+    """Renderiza notificação toast."""
+    
+    color, bg, icon = _TOAST_STYLES[type]
+    
+    st.markdown(_TOAST_TPL.substitute(
+        color=color, bg=bg, icon=icon, message=message
+    ), unsafe_allow_html=True)
 
 
 # ============================================================================
@@ -1005,7 +1107,7 @@ def render_column_selector(
     Returns:
         Lista de colunas selecionadas
     """
-    result = selected_columns.copy()
+    selected_set = set(selected_columns)
     
     if search_enabled:
         search_term = st.text_input(
@@ -1016,45 +1118,46 @@ def render_column_selector(
         search_term = ""
     
     # Filtra colunas pela busca
+    term_lower = search_term.lower()
     filtered_columns = [
         col for col in all_columns
-        if not search_term or search_term.lower() in col.lower()
+        if not search_term or term_lower in col.lower()
     ]
     
+    # Estado de cada checkbox renderizado (coluna -> marcado)
+    checked = {}
+    
     if categories:
+        filtered_set = set(filtered_columns)
         # Renderiza por categoria
         for category_name, category_cols in categories.items():
             # Filtra colunas desta categoria
             visible_cols = [
                 col for col in category_cols
-                if col in filtered_columns
+                if col in filtered_set
             ]
             
             if visible_cols:
                 with st.expander(f"📁 {category_name} ({len(visible_cols)})", expanded=True):
                     for col in visible_cols:
-                        is_selected = col in result
-                        checked = st.checkbox(
+                        checked[col] = st.checkbox(
                             col,
-                            value=is_selected,
+                            value=col in selected_set,
                             key=f"col_{category_name}_{col}"
                         )
-                        
-                        if checked and col not in result:
-                            result.append(col)
-                        elif not checked and col in result:
-                            result.remove(col)
     else:
         # Listagem simples
         for col in filtered_columns:
-            is_selected = col in result
-            checked = st.checkbox(col, value=is_selected, key=f"col_{col}")
-            
-            if checked and col not in result:
-                result.append(col)
-            elif not checked and col in result:
-                result.remove(col)
-    
+            checked[col] = st.checkbox(col, value=col in selected_set, key=f"col_{col}")
+    
+    # Resolve a seleção em uma passada: mantém a ordem original, tira as
+    # desmarcadas e acrescenta as novas na ordem de exibição (fora da busca
+    # nada muda)
+    result = [col for col in selected_columns if checked.get(col, True)]
+    result.extend(
+        col for col, is_checked in checked.items()
+        if is_checked and col not in selected_set
+    )
     return result
 
 
@@ -1151,7 +1254,8 @@ def render_config_summary(config_data: dict, column_manager=None):
     Renderiza resumo visual da configuração.
     
     Args:
-        config_data: Dados de configuração
+        config_data: Dados de configuração (pode trazer "_cached_stats" com o
+            resultado de get_column_stats já calculado)
         column_manager: Instância do ColumnManager (opcional)
     """
     st.subheader("📊 Resumo da Configuração")
@@ -1181,11 +1285,16 @@ def render_config_summary(config_data: dict, column_manager=None):
     # Detalhes adicionais
     if column_manager and columns:
         st.divider()
-        stats = column_manager.get_column_stats(columns)
+        stats = config_data.get("_cached_stats") or column_manager.get_column_stats(columns)
         
         st.caption("**Por Categoria:**")
-        for category, count in stats.get("by_category", {}).items():
-            st.write(f"• {category}: {count} colunas")
+        # Um único elemento em vez de um st.write por categoria
+        by_category = stats.get("by_category", {})
+        if by_category:
+            st.markdown("\n".join(
+                f"- {category}: {count} colunas"
+                for category, count in by_category.items()
+            ))
 
 
 def render_config_diff(old_config: dict, new_config: dict):
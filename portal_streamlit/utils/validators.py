@@ -5,11 +5,22 @@ Funções utilitárias para validação de dados e formatação de mensagens.
 Segue princípios SOLID e DRY para maximizar reusabilidade.
 """
 
+import os
 import re
-from typing import Optional, List, Union, Any
+import stat
+from typing import Optional, List, Union, Any, Iterable, Iterator, Literal, Sequence
 from decimal import Decimal
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+try:
+    # Motor de regex SIMD (opcional), usado só em lotes grandes
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 
 # ============================================================================
 # VALIDATORS - Responsabilidade única de validação
@@ -23,6 +34,10 @@ class EmailValidator:
         r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     )
     
+    # A partir deste tamanho de lote compensa usar o Hyperscan (se instalado)
+    HYPERSCAN_MIN_BATCH = 1000
+    _hs_db = None
+    
     @staticmethod
     def is_valid(email: str) -> bool:
         """
@@ -62,14 +77,70 @@ class EmailValidator:
         valid = []
         invalid = []
         
+        # Aliases locais: evita lookup de atributo/método a cada item
+        add_valid = valid.append
+        add_invalid = invalid.append
+        
+        if hyperscan is not None and len(emails) >= EmailValidator.HYPERSCAN_MIN_BATCH:
+            stripped = [email.strip() for email in emails]
+            hits = EmailValidator._hyperscan_hits(stripped)
+            if hits is not None:
+                for email, hit in zip(stripped, hits):
+                    if hit:
+                        add_valid(email)
+                    else:
+                        add_invalid(email)
+                return valid, invalid
+        
+        fullmatch = EmailValidator.EMAIL_PATTERN.fullmatch
         for email in emails:
             email = email.strip()
-            if EmailValidator.is_valid(email):
-                valid.append(email)
+            if email and fullmatch(email):
+                add_valid(email)
             else:
-                invalid.append(email)
+                add_invalid(email)
                 
         return valid, invalid
+    
+    @staticmethod
+    def _hyperscan_hits(emails: List[str]) -> Optional[List[bool]]:
+        """
+        Valida o lote inteiro com uma única varredura do Hyperscan.
+        
+        Os emails são unidos por quebra de linha e só contam matches que cobrem
+        exatamente um registro. Retorna None se o Hyperscan falhar.
+        """
+        try:
+            db = EmailValidator._hs_db
+            if db is None:
+                db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+                db.compile(
+                    expressions=[EmailValidator.EMAIL_PATTERN.pattern.encode()],
+                    ids=[0],
+                    elements=1,
+                    flags=[hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SOM_LEFTMOST],
+                )
+                EmailValidator._hs_db = db
+            
+            encoded = [email.encode("utf-8") for email in emails]
+            # (início, fim) em bytes de cada registro -> índice no lote
+            bounds = {}
+            pos = 0
+            for i, raw in enumerate(encoded):
+                bounds[(pos, pos + len(raw))] = i
+                pos += len(raw) + 1
+            
+            hits = [False] * len(emails)
+            
+            def on_match(_id, start, end, _flags, _context):
+                i = bounds.get((start, end))
+                if i is not None:
+                    hits[i] = True
+            
+            db.scan(b"\n".join(encoded), match_event_handler=on_match)
+            return hits
+        except Exception:
+            return None
 
 
 class PathValidator:
@@ -92,6 +163,31 @@ class PathValidator:
         except (TypeError, ValueError):
             return False
     
+    @staticmethod
+    def classify(path: Union[str, Path]) -> Literal["file", "dir", "other", "missing"]:
+        """
+        Classifica um caminho com uma única chamada a os.stat.
+        
+        Args:
+            path: Caminho a ser verificado
+            
+        Returns:
+            "file", "dir", "other" (existe, mas não é arquivo nem diretório)
+            ou "missing" (inexistente ou caminho inválido)
+        
+        O caminho passa por Path, como antes: "" vira "." (existe), a barra
+        final é ignorada e caminhos em bytes são rejeitados ("missing").
+        """
+        try:
+            mode = os.stat(Path(path)).st_mode
+        except (OSError, TypeError, ValueError):
+            return "missing"
+        if stat.S_ISREG(mode):
+            return "file"
+        if stat.S_ISDIR(mode):
+            return "dir"
+        return "other"
+    
     @staticmethod
     def exists(path: Union[str, Path]) -> bool:
         """
@@ -103,17 +199,17 @@ class PathValidator:
         Returns:
             True se existe
         """
-        return Path(path).exists() if PathValidator.is_valid_path(path) else False
+        return PathValidator.classify(path) != "missing"
     
     @staticmethod
     def is_file(path: Union[str, Path]) -> bool:
         """Verifica se é um arquivo."""
-        return Path(path).is_file() if PathValidator.exists(path) else False
+        return PathValidator.classify(path) == "file"
     
     @staticmethod
     def is_directory(path: Union[str, Path]) -> bool:
         """Verifica se é um diretório."""
-        return Path(path).is_dir() if PathValidator.exists(path) else False
+        return PathValidator.classify(path) == "dir"
 
 
 class DataValidator:
@@ -154,6 +250,38 @@ class DataValidator:
             return True
         except (ValueError, TypeError):
             return False
+    
+    @staticmethod
+    def is_numeric_bulk(values: Iterable[Any]) -> np.ndarray:
+        """
+        Versão vetorizada de is_numeric para colunas inteiras.
+        
+        Args:
+            values: Valores a verificar (lista, Series, array)
+            
+        Returns:
+            Array booleano com o resultado de is_numeric para cada valor
+            (idêntico à chamada célula a célula)
+        """
+        series = pd.Series(list(values), dtype=object)
+        try:
+            converted = pd.to_numeric(series, errors="coerce")
+        except (TypeError, ValueError):
+            converted = None
+        if converted is None or converted.dtype.kind not in "iuf":
+            # Resultado complexo/objeto (ex.: lote com 1+2j): a máscara do
+            # to_numeric não é confiável, então cada célula vai pelo float()
+            return np.fromiter(
+                (DataValidator.is_numeric(v) for v in series),
+                dtype=bool, count=len(series),
+            )
+        mask = converted.notna().to_numpy(copy=True)
+        # Só os rejeitados e os aceitos de tipos incomuns passam pelo float():
+        # cobre "nan", "1_000", datetime64 etc.
+        plain = series.map(type).isin((int, float, str)).to_numpy()
+        for i in np.flatnonzero(~mask | ~plain):
+            mask[i] = DataValidator.is_numeric(series.iat[i])
+        return mask
 
 
 # ============================================================================
@@ -171,6 +299,11 @@ class RegionFormatter:
         "NNE": "Norte e Nordeste"
     }
     
+    # "CÓDIGO - Nome Completo" pré-formatado para os códigos conhecidos
+    _FORMATTED = {
+        code: f"{code} - {name}" for code, name in REGION_FULL_NAMES.items()
+    }
+    
     @staticmethod
     def to_full_name(region_code: str) -> str:
         """
@@ -206,6 +339,11 @@ class RegionFormatter:
             >>> RegionFormatter.format_with_code("SP1")
             "SP1 - São Paulo 1"
         """
+        formatted = RegionFormatter._FORMATTED.get(region_code)
+        if formatted is not None:
+            return formatted
+        
+        # Código fora do padrão (ex: minúsculas) ou desconhecido
         full_name = RegionFormatter.to_full_name(region_code)
         if full_name == region_code:
             return region_code
@@ -266,8 +404,10 @@ class MessageFormatter:
             "processando: 5/10 (50%)"
         """
         percentage = (current / total * 100) if total > 0 else 0
-        prefix = f"{description}: " if description else ""
-        return f"{prefix}{current}/{total} ({percentage:.0f}%)"
+        # Um único f-string por chamada (sem string de prefixo intermediária)
+        if description:
+            return f"{description}: {current}/{total} ({percentage:.0f}%)"
+        return f"{current}/{total} ({percentage:.0f}%)"
 
 
 # ============================================================================
@@ -359,10 +499,25 @@ class ListHelper:
             >>> ListHelper.chunk([1,2,3,4,5], 2)
             [[1,2], [3,4], [5]]
         """
-        return [
-            items[i:i + chunk_size]
-            for i in range(0, len(items), chunk_size)
-        ]
+        return list(ListHelper.chunk_iter(items, chunk_size))
+    
+    @staticmethod
+    def chunk_iter(items: Sequence[Any], chunk_size: int) -> Iterator[Sequence[Any]]:
+        """
+        Versão preguiçosa de chunk: gera um lote por vez.
+        
+        Útil quando os lotes são percorridos uma única vez (ex: envio de
+        emails), sem materializar todas as sublistas de uma vez.
+        
+        Args:
+            items: Sequência de itens
+            chunk_size: Tamanho de cada chunk
+            
+        Yields:
+            Fatias de até chunk_size itens
+        """
+        for i in range(0, len(items), chunk_size):
+            yield items[i:i + chunk_size]
     
     @staticmethod
     def unique_preserve_order(items: List[Any]) -> List[Any]:
@@ -375,13 +530,10 @@ class ListHelper:
         Returns:
             Lista sem duplicatas na ordem original
         """
-        seen = set()
-        result = []
-        for item in items:
-            if item not in seen:
-                seen.add(item)
-                result.append(item)
-        return result
+        if len(items) < 2:
+            return list(items)
+        # dict preserva ordem de inserção; a deduplicação roda toda em C
+        return list(dict.fromkeys(items))
     
     @staticmethod
     def safe_get(items: List[Any], index: int, default: Any = None) -> Any: